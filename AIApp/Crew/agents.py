@@ -1,16 +1,13 @@
 from crewai import Agent
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
+from ..llm_clients import get_chat_model
 
 # Load environment variables from .env
 load_dotenv()
 
 # Create a LangSmith-instrumented LLM (uses .env vars automatically)
 def get_llm():
-    return ChatOpenAI(
-        model="gpt-4o",
-        temperature=0,
-    )
+    return get_chat_model("gpt-4o", temperature=0)
 
 def create_manager_agent(agents_config: dict) -> Agent:
     return Agent(
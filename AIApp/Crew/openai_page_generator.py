@@ -1,18 +1,31 @@
 import os
+import queue
 import re
+import threading
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterator, List, Sequence
 
-import openai
 from openai.types.responses import ResponseInputParam
 
-client = openai.OpenAI()
+from ..generation_cache import cached_generation, generation_cache_enabled, lookup_generation, store_generation
+from ..llm_clients import get_openai_client, model_slot
+from ..pg_vector import get_search_setting
 
-def get_response_output_text(input: str | ResponseInputParam):
-    client = openai.OpenAI()
-    response = client.responses.create(
-        model="gpt-5",
-        instructions="""
+GENERATION_MODEL = "gpt-5"
+
+# Worker threads used by generate_components; API calls to GENERATION_MODEL
+# are additionally capped process-wide by its MODEL_CONCURRENCY slots
+GENERATION_CONCURRENCY = get_search_setting('GENERATION_CONCURRENCY', 4)
+
+# Marks the end of the deltas queued by stream_response_output_text
+_STREAM_END = object()
+
+# Events that end a streamed response; only response.completed is a success
+_TERMINAL_EVENTS = ("response.completed", "response.failed", "response.incomplete")
+
+COMPONENT_INSTRUCTIONS = """
 You are an assistant that generates HTML components.
 
 Instructions:
@@ -38,10 +51,141 @@ Example output:
   <h1>Hello World</h1>
 </div>
 ```
-""",
-        input=input,
-    )
-    return response.output_text
+"""
+
+
+def get_response_output_text(input: str | ResponseInputParam, use_cache: bool = True, category: str | None = None):
+    def generate():
+        with model_slot(GENERATION_MODEL):
+            response = get_openai_client().responses.create(
+                model=GENERATION_MODEL,
+                instructions=COMPONENT_INSTRUCTIONS,
+                input=input,
+            )
+        return response.output_text
+
+    if not use_cache:
+        return generate()
+    # Repeated or paraphrased requests for the same component category are served from the cache
+    return cached_generation(GENERATION_MODEL, COMPONENT_INSTRUCTIONS, input, generate, category)
+
+
+def stream_response_output_text(input: str | ResponseInputParam) -> Iterator[str]:
+    """
+    Yield the output text deltas of a streamed Responses API call.
+
+    The API stream is read by a background thread into an unbounded queue, so
+    the GENERATION_MODEL slot is released as soon as the model finishes
+    instead of being held for as long as a slow client takes to read.
+    Errors raised by the call are re-raised here, and a stream that does not
+    end with ``response.completed`` (``response.failed``,
+    ``response.incomplete`` or a dropped connection) raises ``RuntimeError``
+    after its deltas, so callers never keep partial output.
+    """
+    deltas = queue.Queue()
+
+    def read_stream():
+        try:
+            with model_slot(GENERATION_MODEL):
+                stream = get_openai_client().responses.create(
+                    model=GENERATION_MODEL,
+                    instructions=COMPONENT_INSTRUCTIONS,
+                    input=input,
+                    stream=True,
+                )
+                terminal = None
+                with stream:
+                    for event in stream:
+                        if event.type == "response.output_text.delta":
+                            deltas.put(event.delta)
+                        elif event.type in _TERMINAL_EVENTS:
+                            terminal = event
+            if terminal is None:
+                raise RuntimeError("Response stream ended without a terminal event")
+            if terminal.type == "response.failed":
+                raise RuntimeError(f"Response failed: {terminal.response.error}")
+            if terminal.type == "response.incomplete":
+                raise RuntimeError(f"Response incomplete: {terminal.response.incomplete_details}")
+        except Exception as e:
+            deltas.put(e)
+        finally:
+            deltas.put(_STREAM_END)
+
+    threading.Thread(target=read_stream, daemon=True).start()
+    while (item := deltas.get()) is not _STREAM_END:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+class HTMLBlockStreamExtractor:
+    """
+    Incremental ``extract_html_from_text``: ``feed`` returns the parts of the
+    fenced ```html block that are known to be final as the text arrives.
+
+    Output that has no ```html block is returned whole by ``finish`` using
+    the regular fallbacks.
+    """
+
+    OPENING = re.compile(r"```html", re.IGNORECASE)
+    FENCE = "```"
+
+    def __init__(self):
+        self.text = ""
+        self.state = "search"  # search -> body -> done
+        self.position = 0      # next unemitted character of the block body
+        self.emitted = []
+
+    def _emit(self, end: int) -> str:
+        fragment = self.text[self.position:end]
+        self.position = end
+        if fragment:
+            self.emitted.append(fragment)
+        return fragment
+
+    def feed(self, delta: str) -> str:
+        self.text += delta
+
+        if self.state == "search":
+            opening = self.OPENING.search(self.text)
+            if not opening:
+                return ""
+            self.state = "body"
+            self.position = opening.end()
+
+        if self.state != "body":
+            return ""
+
+        if not self.emitted:
+            # Leading whitespace is stripped like extract_html_from_text does
+            while self.position < len(self.text) and self.text[self.position].isspace():
+                self.position += 1
+
+        closing = self.text.find(self.FENCE, self.position)
+        if closing != -1:
+            self.state = "done"
+            return self._emit(self.position + len(self.text[self.position:closing].rstrip()))
+
+        # Hold back a possibly partial closing fence and trailing whitespace
+        end = len(self.text)
+        while end > self.position and end > len(self.text) - 2 and self.text[end - 1] == "`":
+            end -= 1
+        end = self.position + len(self.text[self.position:end].rstrip())
+        return self._emit(end)
+
+    def finish(self) -> str:
+        if self.state == "search":
+            html = extract_html_from_text(self.text)
+            self.emitted.append(html)
+            return html
+        if self.state == "body":
+            # Unterminated block: flush what was held back
+            return self._emit(self.position + len(self.text[self.position:].rstrip()))
+        return ""
+
+    @property
+    def html(self) -> str:
+        return "".join(self.emitted)
 
 
 def extract_html_from_text(text: str):
@@ -74,14 +218,100 @@ def save_html(html: str, filename: str) -> Path:
 
 
 
-def make_website(*, website_input: str | ResponseInputParam, filename: str = "website.html"):
-    response_text = get_response_output_text(website_input)
+def make_website(
+    *,
+    website_input: str | ResponseInputParam,
+    filename: str = "website.html",
+    use_cache: bool = True,
+    category: str | None = None
+):
+    response_text = get_response_output_text(website_input, use_cache=use_cache, category=category)
     html = extract_html_from_text(response_text)
     output_path = save_html(html, filename)
 
     return output_path
 
 
+def component_prompt(display_name: str, description: str) -> str:
+    return f"Make me {display_name} component for {description}"
+
+
+def generate_components(specs: Sequence[Dict[str, str]], use_cache: bool = True) -> List[Path | Exception]:
+    """
+    Generate several components in parallel with ``make_website``.
+
+    Each spec needs ``name`` and ``description`` and may set
+    ``display_name`` and ``category``; its HTML is written to
+    ``outputs/<name>.html`` as soon as that component completes. At most
+    ``GENERATION_CONCURRENCY`` generations run at once, and cache misses
+    also wait for a ``GENERATION_MODEL`` slot.
+
+    Returns:
+        Per spec, in order: the output path, or the exception that its
+        generation raised
+    """
+    def generate(spec):
+        return make_website(
+            website_input=component_prompt(spec.get('display_name') or spec['name'], spec['description']),
+            filename=f"{spec['name']}.html",
+            use_cache=use_cache,
+            category=spec.get('category'),
+        )
+
+    if not specs:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(len(specs), GENERATION_CONCURRENCY)) as executor:
+        futures = [executor.submit(generate, spec) for spec in specs]
+
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def make_website_stream(
+    *,
+    website_input: str | ResponseInputParam,
+    filename: str = "website.html",
+    use_cache: bool = True,
+    category: str | None = None
+) -> Iterator[str]:
+    """
+    Streaming ``make_website``: yield HTML fragments of the component as the
+    model generates them, then save the complete HTML to ``filename``.
+
+    Cached generations are yielded in one piece. If the response fails or
+    is cut short the error propagates after the fragments already yielded,
+    and nothing is cached or saved.
+    """
+    use_cache = use_cache and generation_cache_enabled()
+    cached, vector = (None, None)
+    if use_cache:
+        cached, vector = lookup_generation(GENERATION_MODEL, COMPONENT_INSTRUCTIONS, website_input, category)
+
+    if cached is not None:
+        html = extract_html_from_text(cached)
+        yield html
+    else:
+        extractor = HTMLBlockStreamExtractor()
+        for delta in stream_response_output_text(website_input):
+            fragment = extractor.feed(delta)
+            if fragment:
+                yield fragment
+        tail = extractor.finish()
+        if tail:
+            yield tail
+        html = extractor.html
+        if use_cache:
+            store_generation(GENERATION_MODEL, COMPONENT_INSTRUCTIONS, website_input, extractor.text, vector, category)
+
+    save_html(html, filename)
+
+
 # make_website(
 #     website_input="Make me landing page for a retro-games store. Retro-arcade noir some might say",
 #     filename="retro_dark.html",
@@ -2,24 +2,18 @@ import os
 from typing import List, Dict, Any
 import shutil
 from pathlib import Path
-from dotenv import load_dotenv
 from crewai.tools import tool
-from .openai_page_generator import make_website
-from ..models import PortfolioTemplate, Project, Page, Section, Chunk
-import openai
+from .openai_page_generator import component_prompt, generate_components, make_website
+from ..models import PortfolioTemplate
+from ..pg_vector import get_search_setting, load_templates_content
+from ..template_index import find_templates_batch
+from ..embeddings import embed_queries
+from ..ingest import ingest_page
+from ..template_css import get_template_css
 import re
-from langchain_openai import ChatOpenAI
 from langsmith import Client
-from langchain_openai import OpenAIEmbeddings
-from django.db.models import FloatField
-from django.db.models.expressions import RawSQL
-from django.db import transaction
-from bs4 import BeautifulSoup
-import uuid
 import hashlib
 
-# client = openai.OpenAI()
-client = ChatOpenAI(model="gpt-5", temperature=0)
 langsmith_client = Client(api_key=os.getenv("LANGCHAIN_API_KEY"))
 
 
@@ -35,19 +29,37 @@ def get_user_input(prompt: str) -> str:
 #All tools
 
 @tool("get_existing_components")
-def get_existing_components(categories: List[str]) -> List[PortfolioTemplate]:
+def get_existing_components(categories: List[str]) -> str:
     """Get existing portfolio template components by categories list."""
 
-    
-    
-    for category in categories:
-        query_text = f"Get me {category} components"
-        data = get_vector_data(query_text, category)
-        
-        # Add category info to each component for identification
-        
+    # One embedding request and one index lookup for every category
+    query_texts = [f"Get me {category} components" for category in categories]
+    query_vectors = embed_queries(query_texts)
+    matches = find_templates_batch(
+        query_vectors,
+        categories,
+        query_texts=query_texts,
+        k=1,
+        threshold=get_search_setting('TEMPLATE_MATCH_THRESHOLD', 0.4)
+    )
 
-    return {f"components for {category} created successfully"}
+    # Load the heavy columns of every winner in a single query
+    load_templates_content([templates[0] for templates in matches if templates])
+
+    # Write files in the requested order so sections keep their page position
+    missing = []
+    for category, templates in zip(categories, matches):
+        if templates:
+            data = [template_to_data(templates[0])]
+            html_file_creator(data)
+            css_file_creator(data)
+        else:
+            print(f"⚠️ No matching components found for {category}, skipping file creation.")
+            missing.append(category)
+
+    if missing:
+        return f"components created for {len(categories) - len(missing)} categories; no match for: {', '.join(missing)}"
+    return f"components for {', '.join(categories)} created successfully"
 
 def html_file_creator(data):
     file_path = "result.html"
@@ -103,43 +115,13 @@ def html_file_creator(data):
         print(f"ℹ️ No new unique blocks found to add to {file_path}.")
     
 
-def create_css_for_html(html_content):
-    
-    llm = ChatOpenAI(model="gpt-5", temperature=0)
-    
-    instructions=f"""
-You are an assistant that generates CSS for a given HTML component.
-
-Instructions:
-- Analyze the HTML component and generate the CSS for the component.
-- Your response must contain only the code for the component—no explanations, comments, or extra text.
-- The component should be visually appealing, production-ready, and responsive.
-- The code you provide will be inserted directly into an existing CSS file, so ensure it works standalone.
-- Keep your code clean and well-structured.
-
-HTML:
-{html_content}
-"""
-    
-    response = llm.invoke(instructions)
-    return response.content
-    
-
-
 def css_file_creator(data):
     file_path = "result.css"
     content = data[0].get("css_content", "") or data[0].get("css_content", "")
     
     if not content:
-        generated_css = create_css_for_html(data[0].get("content", ""))
-        # Save generated CSS to DB
-        obj = PortfolioTemplate.objects.filter(name=data[0].get("name")).first()
-        if obj:
-            obj.css_content = generated_css
-            obj.save()
-            print(f"💾 CSS saved to DB for component: {obj.name}")
-
-        content = generated_css
+        # Normally filled by `manage.py precompute_template_css`
+        content = get_template_css(data[0].get("name"), data[0].get("content", ""))
     
     variable_content = '''
     
@@ -233,42 +215,16 @@ def css_file_creator(data):
 
 
 
-def get_vector_data(query_text= "footer",category= "footer"):
-
-    embeddings_model = OpenAIEmbeddings(model="text-embedding-3-small")
-
-    query_vector = embeddings_model.embed_query(query_text)
-        
-    
-    threshold = 0.2
-    results = PortfolioTemplate.objects.annotate(
-    similarity=RawSQL(
-        "1 - (embedding <=> %s::vector)",  # <=> is cosine distance in pgvector
-        (query_vector,),
-        output_field=FloatField()
-    )
-    ).filter(similarity__gte=threshold).order_by('-similarity')
-    
-    data = []
-    for t in results:
-        if t.similarity >= 0.4:
-            data.append({
-                "name": t.name,
-                "display_name": t.display_name,
-                "description": t.description,
-                "file_path_template": t.file_path_template,
-                "content":t.content,
-                "css_content":t.css_content
-            })
-    
-    # Only create files if we have data
-    if data:
-        html_file_creator(data)
-        css_file_creator(data)
-    else:
-        print("⚠️ No matching components found, skipping file creation.")
-    
-    return f"component {category} created successfully"
+def template_to_data(t: PortfolioTemplate) -> Dict[str, Any]:
+    """Convert a matched template into the dict used by the file creators."""
+    return {
+        "name": t.name,
+        "display_name": t.display_name,
+        "description": t.description,
+        "file_path_template": t.file_path_template,
+        "content": t.content,
+        "css_content": t.css_content
+    }
 
 
 @tool("create_css_file")
@@ -287,10 +243,24 @@ def ask_user(question: str) -> str:
 @tool("create_new_component")
 def create_new_component(category: str, name: str, display_name: str, description: str) -> str:
     """Create a new component in html format and return the file path."""
-    path_name  =  make_website(website_input=f"Make me {display_name} component for {description}", filename=f"{name}.html")
+    path_name  =  make_website(website_input=component_prompt(display_name, description), filename=f"{name}.html", category=category)
     return path_name
 
 
+@tool("create_new_components")
+def create_new_components(components: List[Dict[str, str]]) -> str:
+    """Create several new components in parallel. Each component is a dict with category, name, display_name and description. Returns the created file paths."""
+    results = generate_components(components)
+
+    lines = []
+    for component, result in zip(components, results):
+        if isinstance(result, Exception):
+            lines.append(f"❌ {component.get('name')}: {result}")
+        else:
+            lines.append(f"✅ {component.get('name')}: {result}")
+    return "\n".join(lines)
+
+
 @tool("combine_components")
 def combine_components(component_paths: List[str], page_title: str = "Generated Page") -> str:
     """Combine multiple HTML components into a single complete HTML page."""
@@ -428,225 +398,6 @@ def copy_html_file(source_file_path: str, destination_filename: str = "final_pag
     # save_css_file()
     return str(output_path)
 
-# =============================================================================
-# HTML PARSING AND TEXT EXTRACTION FUNCTIONS
-# =============================================================================
-
-def extract_text_from_html(html_content: str) -> str:
-    """Extract clean text content from HTML for embedding."""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Remove script and style elements
-    for script in soup(["script", "style"]):
-        script.decompose()
-    
-    # Get text and clean it up
-    text = soup.get_text()
-    
-    # Clean up whitespace
-    lines = (line.strip() for line in text.splitlines())
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    text = ' '.join(chunk for chunk in chunks if chunk)
-    
-    return text
-
-def parse_html_sections(html_content: str) -> List[Dict[str, Any]]:
-    """Parse HTML content and extract sections."""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    sections = []
-    
-    # Define section types and their corresponding HTML tags
-    section_mapping = {
-        'header': ['header', 'nav'],
-        'hero': ['section.hero', 'div.hero', 'section.banner'],
-        'about': ['section.about', 'div.about'],
-        'portfolio': ['section.portfolio', 'div.portfolio', 'section.projects'],
-        'skills': ['section.skills', 'div.skills'],
-        'experience': ['section.experience', 'div.experience'],
-        'contact': ['section.contact', 'div.contact'],
-        'footer': ['footer']
-    }
-    
-    section_order = 0
-    
-    for section_type, selectors in section_mapping.items():
-        for selector in selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                if element.get_text().strip():  # Only include non-empty sections
-                    section_id = f"{section_type}_{section_order}"
-                    sections.append({
-                        'section_id': section_id,
-                        'section_name': f"{section_type.title()} Section",
-                        'section_type': section_type,
-                        'html_content': str(element),
-                        'text_content': extract_text_from_html(str(element)),
-                        'order': section_order
-                    })
-                    section_order += 1
-    
-    # If no specific sections found, create a general section
-    if not sections:
-        sections.append({
-            'section_id': 'main_content',
-            'section_name': 'Main Content',
-            'section_type': 'other',
-            'html_content': html_content,
-            'text_content': extract_text_from_html(html_content),
-            'order': 0
-        })
-    
-    return sections
-
-def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[Dict[str, Any]]:
-    """Split text into chunks for embedding."""
-    if len(text) <= chunk_size:
-        return [{
-            'chunk_id': hashlib.md5(text.encode()).hexdigest()[:8],
-            'chunk_name': 'Full Content',
-            'html_content': text,
-            'text_content': text,
-            'chunk_size': len(text),
-            'order': 0
-        }]
-    
-    chunks = []
-    start = 0
-    chunk_order = 0
-    
-    while start < len(text):
-        end = start + chunk_size
-        chunk_text_content = text[start:end]
-        
-        # Try to break at sentence boundary
-        if end < len(text):
-            last_period = chunk_text_content.rfind('.')
-            last_exclamation = chunk_text_content.rfind('!')
-            last_question = chunk_text_content.rfind('?')
-            
-            last_sentence_end = max(last_period, last_exclamation, last_question)
-            if last_sentence_end > start + chunk_size // 2:  # Don't make chunks too small
-                end = start + last_sentence_end + 1
-                chunk_text_content = text[start:end]
-        
-        chunk_id = hashlib.md5(chunk_text_content.encode()).hexdigest()[:8]
-        
-        chunks.append({
-            'chunk_id': chunk_id,
-            'chunk_name': f'Chunk {chunk_order + 1}',
-            'html_content': chunk_text_content,  # For HTML chunks, we'll use the same content
-            'text_content': chunk_text_content,
-            'chunk_size': len(chunk_text_content),
-            'order': chunk_order
-        })
-        
-        start = end - overlap
-        chunk_order += 1
-    
-    return chunks
-
-# =============================================================================
-# DATABASE OPERATIONS
-# =============================================================================
-
-@transaction.atomic
-def create_project(project_id: str, project_name: str, description: str, html_file_path: str) -> Project:
-    """Create a new project in the database."""
-    project, created = Project.objects.get_or_create(
-        project_id=project_id,
-        defaults={
-            'project_name': project_name,
-            'description': description,
-            'html_file_path': html_file_path
-        }
-    )
-    
-    if created:
-        print(f"✅ Created new project: {project_name} ({project_id})")
-    else:
-        print(f"ℹ️ Project already exists: {project_name} ({project_id})")
-    
-    return project
-
-@transaction.atomic
-def create_page(project: Project, page_id: str, page_name: str, page_type: str, html_content: str) -> Page:
-    """Create a new page in the database."""
-    page, created = Page.objects.get_or_create(
-        project=project,
-        page_id=page_id,
-        defaults={
-            'page_name': page_name,
-            'page_type': page_type,
-            'html_content': html_content
-        }
-    )
-    
-    if created:
-        print(f"✅ Created new page: {page_name} ({page_id})")
-    else:
-        print(f"ℹ️ Page already exists: {page_name} ({page_id})")
-    
-    return page
-
-@transaction.atomic
-def create_section(page: Page, section_data: Dict[str, Any]) -> Section:
-    """Create a new section in the database."""
-    section, created = Section.objects.get_or_create(
-        page=page,
-        section_id=section_data['section_id'],
-        defaults={
-            'section_name': section_data['section_name'],
-            'section_type': section_data['section_type'],
-            'html_content': section_data['html_content'],
-            'order': section_data['order']
-        }
-    )
-    
-    if created:
-        print(f"✅ Created new section: {section_data['section_name']} ({section_data['section_id']})")
-    else:
-        print(f"ℹ️ Section already exists: {section_data['section_name']} ({section_data['section_id']})")
-    
-    return section
-
-@transaction.atomic
-def create_chunk_with_embedding(section: Section, chunk_data: Dict[str, Any], embedding: List[float]) -> Chunk:
-    """Create a new chunk with embedding in the database."""
-    chunk, created = Chunk.objects.get_or_create(
-        section=section,
-        chunk_id=chunk_data['chunk_id'],
-        defaults={
-            'chunk_name': chunk_data['chunk_name'],
-            'html_content': chunk_data['html_content'],
-            'text_content': chunk_data['text_content'],
-            'embedding': embedding,
-            'chunk_size': chunk_data['chunk_size'],
-            'order': chunk_data['order']
-        }
-    )
-    
-    if created:
-        print(f"✅ Created new chunk with embedding: {chunk_data['chunk_name']} ({chunk_data['chunk_id']})")
-    else:
-        # Update embedding if chunk exists but embedding is different
-        if chunk.embedding != embedding:
-            chunk.embedding = embedding
-            chunk.save()
-            print(f"🔄 Updated embedding for chunk: {chunk_data['chunk_name']} ({chunk_data['chunk_id']})")
-        else:
-            print(f"ℹ️ Chunk already exists: {chunk_data['chunk_name']} ({chunk_data['chunk_id']})")
-    
-    return chunk
-
-# =============================================================================
-# EMBEDDING GENERATION
-# =============================================================================
-
-def generate_embedding(text: str) -> List[float]:
-    """Generate embedding for text using OpenAI."""
-    embeddings_model = OpenAIEmbeddings(model="text-embedding-3-small")
-    return embeddings_model.embed_query(text)
-
 # =============================================================================
 # MAIN ORCHESTRATION FUNCTION
 # =============================================================================
@@ -680,55 +431,33 @@ def save_html_to_database_with_embeddings():
         project_id = hashlib.md5(f"{project_name}_{html_file_path}".encode()).hexdigest()[:12]
         page_id = hashlib.md5(f"{page_name}_{project_id}".encode()).hexdigest()[:12]
         
-        # Create project
-        project = create_project(
-            project_id=project_id,
-            project_name=project_name,
-            description=project_description,
-            html_file_path=html_file_path
-        )
-        
-        # Create page
-        page = create_page(
-            project=project,
-            page_id=page_id,
-            page_name=page_name,
-            page_type=page_type,
-            html_content=html_content
+        # Parse, chunk, embed and upsert the project, page and sections
+        counts = ingest_page(
+            project_data={
+                'project_id': project_id,
+                'project_name': project_name,
+                'description': project_description,
+                'html_file_path': html_file_path
+            },
+            page_data={
+                'page_id': page_id,
+                'page_name': page_name,
+                'page_type': page_type,
+                'html_content': html_content
+            },
+            defer_embeddings=get_search_setting('DEFER_CHUNK_EMBEDDINGS', True)
         )
         
-        # Parse sections from HTML
-        sections_data = parse_html_sections(html_content)
-        print(f"📄 Found {len(sections_data)} sections in HTML")
-        
-        total_chunks = 0
-        
-        # Process each section
-        for section_data in sections_data:
-            # Create section
-            section = create_section(page, section_data)
-            
-            # Create chunks for this section
-            chunks_data = chunk_text(section_data['text_content'])
-            print(f"📦 Created {len(chunks_data)} chunks for section: {section_data['section_name']}")
-            
-            # Process each chunk
-            for chunk_data in chunks_data:
-                # Generate embedding for the chunk
-                embedding = generate_embedding(chunk_data['text_content'])
-                
-                # Create chunk with embedding
-                create_chunk_with_embedding(section, chunk_data, embedding)
-                total_chunks += 1
-        
         return f"""
 ✅ Successfully saved HTML to database with embeddings!
 
 📊 Summary:
 - Project: {project_name} ({project_id})
 - Page: {page_name} ({page_id})
-- Sections: {len(sections_data)}
-- Total Chunks with Embeddings: {total_chunks}
+- Sections: {counts['sections']}
+- Chunks: {counts['chunks']}
+- Chunks Embedded: {counts['reused_embeddings'] + counts['computed_embeddings']} ({counts['reused_embeddings']} reused, {counts['computed_embeddings']} computed)
+- Chunks Pending Embedding: {counts['pending_embeddings']} (embedded by `manage.py embedding_worker`)
 - File: {html_file_path}
         """
         
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AiappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'AIApp'
+
+    def ready(self):
+        # Register template index invalidation handlers
+        from . import signals  # noqa: F401
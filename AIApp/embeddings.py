@@ -0,0 +1,374 @@
+"""
+Embedding helpers shared by the crew tools and the ingestion code.
+
+Vectors come from the provider selected by ``EMBEDDING_PROVIDER``: 'openai'
+(the API model named by ``EMBEDDING_MODEL``) or 'onnx' (a local sentence
+embedding model run with onnxruntime on the CPU). Providers return vectors
+of ``EMBEDDING_DIMENSION`` length; smaller local vectors are zero-padded,
+which leaves cosine similarity unchanged, so the same columns and indexes
+serve either provider (except the 'matryoshka' coarse stage, which needs
+OpenAI vectors). Switching provider requires re-indexing.
+
+Document embeddings are sent in batches bounded by ``EMBEDDING_BATCH_SIZE``
+inputs and ``EMBEDDING_BATCH_MAX_CHARS`` characters per request, so a page's
+chunks cost one or two round-trips instead of one per chunk. Document
+vectors are also kept in the ``StoredEmbedding`` table keyed by content hash
+and model, so re-ingesting unchanged text never calls the API again.
+
+Query embeddings go through a two-tier cache keyed by (model, normalised
+text): a small in-process LRU in front of a persistent diskcache store, so
+recurring lookups such as "Get me footer components" skip the provider.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .llm_clients import get_embeddings_model, model_slot
+from .pg_vector import get_search_setting
+
+logger = logging.getLogger(__name__)
+
+
+def iter_batches(texts: Sequence[str], batch_size: int, max_chars: int) -> Iterator[List[str]]:
+    """Split ``texts`` into consecutive batches within both request limits."""
+    batch, batch_chars = [], 0
+    for text in texts:
+        if batch and (len(batch) >= batch_size or batch_chars + len(text) > max_chars):
+            yield batch
+            batch, batch_chars = [], 0
+        batch.append(text)
+        batch_chars += len(text)
+    if batch:
+        yield batch
+
+
+class EmbeddingProvider(ABC):
+    """Turns texts into vectors of the stored embedding dimension."""
+
+    model_name = ''
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+
+    @abstractmethod
+    def _embed(self, texts: List[str]) -> List[Sequence[float]]:
+        """Vectors of ``texts`` in the model's own dimension."""
+
+    def fit(self, vector: Sequence[float]) -> List[float]:
+        """Zero-pad ``vector`` to the stored dimension."""
+        vector = list(vector)
+        if len(vector) > self.dimensions:
+            raise ValueError(
+                f"{self.model_name} returns {len(vector)}-dimensional vectors, "
+                f"more than EMBEDDING_DIMENSION ({self.dimensions})"
+            )
+        return vector + [0.0] * (self.dimensions - len(vector))
+
+    def embed_documents(self, texts: Sequence[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return [self.fit(vector) for vector in self._embed(list(texts))]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings API, batched by ``EMBEDDING_BATCH_SIZE`` / ``EMBEDDING_BATCH_MAX_CHARS``."""
+
+    def __init__(self, model: str, dimensions: int):
+        super().__init__(dimensions)
+        self.model_name = model
+        self.client = get_embeddings_model(model)
+
+    def _embed(self, texts: List[str]) -> List[Sequence[float]]:
+        batch_size = get_search_setting('EMBEDDING_BATCH_SIZE', 512)
+        max_chars = get_search_setting('EMBEDDING_BATCH_MAX_CHARS', 400000)
+
+        vectors = []
+        for batch in iter_batches(texts, batch_size, max_chars):
+            with model_slot(self.model_name):
+                vectors.extend(self.client.embed_documents(batch))
+            logger.debug(f"Embedded batch of {len(batch)} texts with {self.model_name}")
+
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        with model_slot(self.model_name):
+            return self.fit(self.client.embed_query(text))
+
+
+class OnnxEmbeddingProvider(EmbeddingProvider):
+    """
+    Local sentence-embedding model (e.g. an ONNX export of all-MiniLM-L6-v2)
+    run with onnxruntime on the CPU.
+
+    Texts are tokenized with a Hugging Face ``tokenizer.json``, grouped by
+    length into batches of ``batch_size`` to keep padding small, and
+    mean-pooled over the attention mask into L2-normalised vectors.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        tokenizer_path: str,
+        dimensions: int,
+        model_name: Optional[str] = None,
+        threads: int = 0,
+        batch_size: int = 32,
+        max_length: int = 256
+    ):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        super().__init__(dimensions)
+        self.model_name = model_name or os.path.splitext(os.path.basename(model_path))[0]
+        self.batch_size = batch_size
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            model_path, sess_options=options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        if self.tokenizer.padding is None:
+            self.tokenizer.enable_padding()
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {
+            'input_ids': np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            'attention_mask': attention_mask,
+        }
+        if 'token_type_ids' in self.input_names:
+            feeds['token_type_ids'] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        output = self.session.run(None, feeds)[0]
+        if output.ndim == 3:
+            # Mean-pool token embeddings, ignoring padding
+            mask = attention_mask[:, :, None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return output / norms
+
+    def _embed(self, texts: List[str]) -> List[Sequence[float]]:
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            positions = order[start:start + self.batch_size]
+            for position, vector in zip(positions, self._embed_batch([texts[i] for i in positions])):
+                vectors[position] = vector.tolist()
+        return vectors
+
+
+@lru_cache(maxsize=None)
+def get_embedding_provider() -> EmbeddingProvider:
+    """The embedding provider configured in ``VECTOR_SEARCH_SETTINGS``."""
+    provider = get_search_setting('EMBEDDING_PROVIDER', 'openai')
+    dimensions = get_search_setting('EMBEDDING_DIMENSION', 1536)
+
+    if provider == 'openai':
+        return OpenAIEmbeddingProvider(get_search_setting('EMBEDDING_MODEL', 'text-embedding-3-small'), dimensions)
+    if provider == 'onnx':
+        return OnnxEmbeddingProvider(
+            model_path=get_search_setting('ONNX_MODEL_PATH'),
+            tokenizer_path=get_search_setting('ONNX_TOKENIZER_PATH'),
+            dimensions=dimensions,
+            model_name=get_search_setting('ONNX_MODEL_NAME'),
+            threads=get_search_setting('ONNX_THREADS', 0),
+            batch_size=get_search_setting('ONNX_BATCH_SIZE', 32),
+            max_length=get_search_setting('ONNX_MAX_LENGTH', 256)
+        )
+    raise ValueError(f"Unknown embedding provider: {provider}")
+
+
+def get_embedding_model_name() -> str:
+    """Model name used to key cached and stored embeddings."""
+    return get_embedding_provider().model_name
+
+
+class EmbeddingCache:
+    """In-process LRU backed by an on-disk diskcache store."""
+
+    def __init__(self, max_entries: int = 1024, directory: Optional[str] = None, size_limit: int = 2 ** 28):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.size_limit = size_limit
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        normalised = ' '.join(text.split()).casefold()
+        digest = hashlib.sha256(normalised.encode('utf-8')).hexdigest()
+        return f"{model}:{digest}"
+
+    @property
+    def disk(self):
+        """Open the disk tier on first use; ``None`` when disabled."""
+        if self._disk is None and self.directory:
+            from diskcache import Cache
+            self._disk = Cache(
+                self.directory,
+                size_limit=self.size_limit,
+                eviction_policy='least-recently-used'
+            )
+        return self._disk
+
+    def _remember(self, key: str, vector: List[float]):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        key = self.make_key(model, text)
+
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector
+
+        if self.disk is not None:
+            vector = self.disk.get(key)
+            if vector is not None:
+                self.disk_hits += 1
+                self._remember(key, vector)
+                return vector
+
+        self.misses += 1
+        return None
+
+    def set(self, model: str, text: str, vector: List[float]):
+        key = self.make_key(model, text)
+        vector = list(vector)
+        self._remember(key, vector)
+        if self.disk is not None:
+            self.disk.set(key, vector)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_entries': len(self._memory),
+            'disk_entries': len(self.disk) if self.disk is not None else 0,
+        }
+
+
+query_embedding_cache = EmbeddingCache(
+    max_entries=get_search_setting('EMBEDDING_CACHE_MEMORY_ENTRIES', 1024),
+    directory=get_search_setting('EMBEDDING_CACHE_DIR'),
+    size_limit=get_search_setting('EMBEDDING_CACHE_SIZE_LIMIT', 2 ** 28)
+)
+
+
+def embed_query(text: str) -> List[float]:
+    """Embed a search query, serving repeated queries from the cache."""
+    provider = get_embedding_provider()
+
+    vector = query_embedding_cache.get(provider.model_name, text)
+    if vector is None:
+        vector = provider.embed_query(text)
+        query_embedding_cache.set(provider.model_name, text, vector)
+
+    return vector
+
+
+def embed_queries(texts: List[str]) -> List[List[float]]:
+    """Embed several search queries, sending all cache misses in one request."""
+    provider = get_embedding_provider()
+
+    vectors = [query_embedding_cache.get(provider.model_name, text) for text in texts]
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+    if missing:
+        embedded = provider.embed_documents([texts[i] for i in missing])
+        for i, vector in zip(missing, embedded):
+            query_embedding_cache.set(provider.model_name, texts[i], vector)
+            vectors[i] = vector
+
+    return vectors
+
+
+def embed_documents(texts: Sequence[str]) -> List[List[float]]:
+    """
+    Embed document texts in batches with the configured provider.
+
+    Returns:
+        One vector per input text, in input order
+    """
+    return get_embedding_provider().embed_documents(texts)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def embed_documents_with_store(texts: Sequence[str]) -> Tuple[List[List[float]], Dict[str, int]]:
+    """
+    Embed document texts, reusing vectors already in the embedding store.
+
+    Only texts whose (content hash, model) pair is not stored are sent to
+    the API, each distinct text once; the new vectors are then stored.
+
+    Returns:
+        (one vector per input text in input order,
+         {'reused': texts served from the store, 'computed': texts embedded})
+    """
+    from .models import StoredEmbedding
+
+    model = get_embedding_model_name()
+    hashes = [content_hash(text) for text in texts]
+
+    stored = dict(
+        StoredEmbedding.objects
+        .filter(model=model, content_hash__in=set(hashes))
+        .values_list('content_hash', 'embedding')
+    )
+
+    # Distinct texts still missing, in first-seen order
+    missing = {}
+    for digest, text in zip(hashes, texts):
+        if digest not in stored:
+            missing.setdefault(digest, text)
+
+    if missing:
+        embedded = embed_documents(list(missing.values()))
+        new_vectors = dict(zip(missing, embedded))
+        StoredEmbedding.objects.bulk_create(
+            [
+                StoredEmbedding(content_hash=digest, model=model, embedding=vector)
+                for digest, vector in new_vectors.items()
+            ],
+            ignore_conflicts=True
+        )
+        stored.update(new_vectors)
+
+    counts = {'reused': len(texts) - len(missing), 'computed': len(missing)}
+    logger.info(f"Embeddings: {counts['reused']} reused, {counts['computed']} computed")
+
+    return [stored[digest] for digest in hashes], counts
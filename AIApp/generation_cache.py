@@ -0,0 +1,234 @@
+"""
+Cache of generated components for ``openai_page_generator.make_website``.
+
+A generation is looked up in two steps:
+
+- exact hit: same model, instructions, component category and prompt
+  (whitespace and case normalised), served from the in-process LRU or the
+  diskcache store;
+- near hit: the prompt's embedding is compared with the embeddings of the
+  prompts in the in-process LRU generated with the same model, instructions
+  and component category, and the closest one is reused when its cosine
+  similarity reaches ``GENERATION_CACHE_THRESHOLD``. The disk tier only
+  serves exact hits, so after a restart near hits resume as entries are
+  generated again or loaded by an exact hit.
+
+Entries expire after ``GENERATION_CACHE_TTL`` seconds and the least recently
+used ones are evicted beyond ``GENERATION_CACHE_MAX_ENTRIES``.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from .pg_vector import get_search_setting
+
+logger = logging.getLogger(__name__)
+
+
+def normalise_prompt(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return ' '.join(prompt.split()).casefold()
+    # Structured Responses API input
+    return json.dumps(prompt, sort_keys=True, default=str)
+
+
+class GenerationCache:
+    """In-process LRU of generated outputs with TTL, backed by diskcache."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: Optional[float] = 86400,
+        threshold: Optional[float] = 0.95,
+        directory: Optional[str] = None,
+        size_limit: int = 2 ** 28
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.directory = directory
+        self.size_limit = size_limit
+        # key -> {'created_at', 'scope', 'vector', 'output'}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+
+    @staticmethod
+    def make_scope(model: str, instructions: str, category: Optional[str] = None) -> str:
+        """
+        Generations are only shared between calls with the same model,
+        instructions and component category, so a footer prompt never
+        reuses a similar hero prompt's output.
+        """
+        digest = hashlib.sha256(instructions.encode('utf-8')).hexdigest()[:16]
+        category = ' '.join((category or '').split()).casefold()
+        return f"{model}:{digest}:{category}"
+
+    @staticmethod
+    def make_key(scope: str, prompt: Any) -> str:
+        digest = hashlib.sha256(normalise_prompt(prompt).encode('utf-8')).hexdigest()
+        return f"{scope}:{digest}"
+
+    @property
+    def disk(self):
+        """Open the disk tier on first use; ``None`` when disabled."""
+        if self._disk is None and self.directory:
+            from diskcache import Cache
+            self._disk = Cache(
+                self.directory,
+                size_limit=self.size_limit,
+                eviction_policy='least-recently-used'
+            )
+        return self._disk
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        return bool(self.ttl) and time.time() - entry['created_at'] > self.ttl
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_exact(self, scope: str, prompt: Any) -> Optional[str]:
+        key = self.make_key(scope, prompt)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self._remember(key, entry)
+
+        return entry['output'] if entry is not None else None
+
+    def get_near(self, scope: str, vector) -> Optional[str]:
+        """Output of the most similar unexpired prompt in ``scope``, if close enough."""
+        if not self.threshold:
+            return None
+
+        with self._lock:
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if entry['scope'] == scope and entry['vector'] is not None and not self._is_expired(entry)
+            ]
+        if not candidates:
+            return None
+
+        query = np.asarray(vector, dtype=np.float32)
+        matrix = np.vstack([entry['vector'] for _, entry in candidates])
+        scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        key, entry = candidates[best]
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        logger.info(f"Generation cache near hit (similarity {scores[best]:.3f})")
+        return entry['output']
+
+    def set(self, scope: str, prompt: Any, output: str, vector=None):
+        if vector is not None:
+            vector = np.asarray(vector, dtype=np.float32)
+            vector = vector / (np.linalg.norm(vector) or 1.0)
+
+        key = self.make_key(scope, prompt)
+        entry = {'created_at': time.time(), 'scope': scope, 'vector': vector, 'output': output}
+        self._remember(key, entry)
+        if self.disk is not None:
+            self.disk.set(key, entry, expire=self.ttl or None)
+
+
+generation_cache = GenerationCache(
+    max_entries=get_search_setting('GENERATION_CACHE_MAX_ENTRIES', 256),
+    ttl=get_search_setting('GENERATION_CACHE_TTL', 86400),
+    threshold=get_search_setting('GENERATION_CACHE_THRESHOLD', 0.95),
+    directory=get_search_setting('GENERATION_CACHE_DIR'),
+    size_limit=get_search_setting('GENERATION_CACHE_SIZE_LIMIT', 2 ** 28)
+)
+
+
+def generation_cache_enabled() -> bool:
+    return bool(get_search_setting('GENERATION_CACHE_ENABLED', True))
+
+
+def lookup_generation(
+    model: str,
+    instructions: str,
+    prompt: Any,
+    category: Optional[str] = None
+) -> Tuple[Optional[str], Optional[np.ndarray]]:
+    """
+    Look ``prompt`` up in the generation cache among the generations of the
+    same component ``category``.
+
+    Only string prompts take part in the near-hit lookup.
+
+    Returns:
+        (cached output or None, prompt embedding to pass to ``store_generation``)
+    """
+    scope = generation_cache.make_scope(model, instructions, category)
+
+    output = generation_cache.get_exact(scope, prompt)
+    if output is not None:
+        return output, None
+
+    vector = None
+    if isinstance(prompt, str) and generation_cache.threshold:
+        from .embeddings import embed_query
+        try:
+            vector = embed_query(prompt)
+        except Exception as e:
+            logger.warning(f"Could not embed prompt for the generation cache: {str(e)}")
+
+    if vector is not None:
+        output = generation_cache.get_near(scope, vector)
+        if output is not None:
+            return output, vector
+
+    return None, vector
+
+
+def store_generation(
+    model: str,
+    instructions: str,
+    prompt: Any,
+    output: str,
+    vector=None,
+    category: Optional[str] = None
+):
+    generation_cache.set(generation_cache.make_scope(model, instructions, category), prompt, output, vector)
+
+
+def cached_generation(
+    model: str,
+    instructions: str,
+    prompt: Any,
+    generate: Callable[[], str],
+    category: Optional[str] = None
+) -> str:
+    """Return a cached output for ``prompt`` or call ``generate()`` and cache it."""
+    if not generation_cache_enabled():
+        return generate()
+
+    output, vector = lookup_generation(model, instructions, prompt, category)
+    if output is None:
+        output = generate()
+        store_generation(model, instructions, prompt, output, vector, category)
+    return output
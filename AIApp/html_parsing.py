@@ -0,0 +1,311 @@
+"""
+Pure HTML parsing and chunking for ingestion.
+
+Nothing here touches Django, so these functions can run in worker processes
+(see ``parse_html_file``) while the main process embeds and writes. lxml
+(a pinned requirement) is the BeautifulSoup tree builder, so section and
+chunk boundaries do not depend on what happens to be installed.
+"""
+
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+import tiktoken
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+HTML_PARSER = 'lxml'
+
+# (section dict, chunk dicts of that section) pairs for one page
+ParsedPage = List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]
+
+# =============================================================================
+# HTML PARSING AND TEXT EXTRACTION FUNCTIONS
+# =============================================================================
+
+# Section types and the `tag` / `tag.class` selectors that identify them,
+# in priority order
+SECTION_SELECTORS = {
+    'header': ['header', 'nav'],
+    'hero': ['section.hero', 'div.hero', 'section.banner'],
+    'about': ['section.about', 'div.about'],
+    'portfolio': ['section.portfolio', 'div.portfolio', 'section.projects'],
+    'skills': ['section.skills', 'div.skills'],
+    'experience': ['section.experience', 'div.experience'],
+    'contact': ['section.contact', 'div.contact'],
+    'footer': ['footer']
+}
+
+# tag name -> [(required class or None, section type, priority)]
+_SECTION_RULES: Dict[str, List[Tuple[Optional[str], str, int]]] = {}
+for _priority, (_section_type, _selector) in enumerate(
+    (section_type, selector) for section_type, selectors in SECTION_SELECTORS.items() for selector in selectors
+):
+    _tag, _, _css_class = _selector.partition('.')
+    _SECTION_RULES.setdefault(_tag, []).append((_css_class or None, _section_type, _priority))
+
+TEXT_SKIP_TAGS = {'script', 'style'}
+
+
+def clean_text(text: str) -> str:
+    """Collapse the whitespace of extracted text."""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+def element_text(element: Tag) -> str:
+    """Clean text of an already-parsed element, ignoring scripts and styles."""
+    parts = []
+    stack = [element]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Tag):
+            if node.name not in TEXT_SKIP_TAGS:
+                stack.extend(reversed(node.contents))
+        elif type(node) in (NavigableString, CData):
+            parts.append(str(node))
+    return clean_text(''.join(parts))
+
+def extract_text_from_html(html_content: str) -> str:
+    """Extract clean text content from HTML for embedding."""
+    return element_text(BeautifulSoup(html_content, HTML_PARSER))
+
+def classify_section(element: Tag) -> Optional[Tuple[str, int]]:
+    """Return (section type, selector priority) for a section element, else None."""
+    rules = _SECTION_RULES.get(element.name)
+    if not rules:
+        return None
+    classes = element.get('class') or ()
+    for css_class, section_type, priority in rules:
+        if css_class is None or css_class in classes:
+            return section_type, priority
+    return None
+
+def parse_html_sections(html_content: str) -> List[Dict[str, Any]]:
+    """
+    Parse HTML content and extract sections.
+
+    The tree is walked once in document order. Each element is classified
+    against ``SECTION_SELECTORS`` and its text is taken from the parsed tree
+    directly; elements nested inside an already-extracted section are not
+    extracted again. Sections are numbered by selector priority, then
+    document order.
+    """
+    soup = BeautifulSoup(html_content, HTML_PARSER)
+    found = []
+    
+    stack = list(reversed(soup.contents))
+    while stack:
+        element = stack.pop()
+        if not isinstance(element, Tag):
+            continue
+        match = classify_section(element)
+        if match:
+            text = element_text(element)
+            if text:  # Only include non-empty sections
+                found.append((match[1], len(found), match[0], element, text))
+            continue
+        stack.extend(reversed(element.contents))
+    
+    found.sort(key=lambda item: item[:2])
+    sections = [
+        {
+            'section_id': f"{section_type}_{section_order}",
+            'section_name': f"{section_type.title()} Section",
+            'section_type': section_type,
+            'html_content': str(element),
+            'text_content': text,
+            'order': section_order
+        }
+        for section_order, (_, _, section_type, element, text) in enumerate(found)
+    ]
+    
+    # If no specific sections found, create a general section
+    if not sections:
+        sections.append({
+            'section_id': 'main_content',
+            'section_name': 'Main Content',
+            'section_type': 'other',
+            'html_content': html_content,
+            'text_content': element_text(soup),
+            'order': 0
+        })
+    
+    return sections
+
+# Chunking defaults; ingestion passes the VECTOR_SEARCH_SETTINGS values
+DEFAULT_CHUNK_TOKENS = 256
+DEFAULT_CHUNK_OVERLAP_TOKENS = 50
+DEFAULT_MAX_TOKENS = 8000
+DEFAULT_EMBEDDING_MODEL = 'text-embedding-3-small'
+
+SENTENCE_PATTERN = re.compile(r'[^.!?]*(?:[.!?]+|$)')
+
+
+class TokenizerEncoding:
+    """tiktoken-style ``encode``/``decode`` over a Hugging Face ``tokenizer.json``."""
+
+    def __init__(self, tokenizer_path: str):
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        # Count every token of the text, without the model's own limits
+        self.tokenizer.no_truncation()
+        self.tokenizer.no_padding()
+
+    def encode(self, text: str) -> List[int]:
+        return self.tokenizer.encode(text, add_special_tokens=False).ids
+
+    def decode(self, tokens: List[int]) -> str:
+        return self.tokenizer.decode(tokens)
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str, tokenizer_path: Optional[str] = None):
+    """
+    Encoding chunk sizes are counted in: the local model's tokenizer when
+    ``tokenizer_path`` is given, else the tiktoken encoding used by ``model``
+    (cl100k_base when unknown).
+    """
+    if tokenizer_path:
+        return TokenizerEncoding(tokenizer_path)
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+def iter_sentences(text: str) -> Iterator[Tuple[int, int]]:
+    """Yield (start, end) spans of the sentences of ``text``, whitespace trimmed."""
+    for match in SENTENCE_PATTERN.finditer(text):
+        start, end = match.span()
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            yield start, end
+
+def _make_chunk(text: str, order: int, name: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        'chunk_id': hashlib.md5(text.encode()).hexdigest()[:8],
+        'chunk_name': name or f'Chunk {order + 1}',
+        'html_content': text,  # For HTML chunks, we'll use the same content
+        'text_content': text,
+        'chunk_size': len(text),
+        'order': order
+    }
+
+def _iter_chunk_texts(
+    text: str,
+    encoding,
+    chunk_tokens: int,
+    overlap_tokens: int
+) -> Iterator[str]:
+    """
+    Pack whole sentences into chunks of at most ``chunk_tokens`` tokens,
+    carrying up to ``overlap_tokens`` tokens of trailing sentences into the
+    next chunk. A sentence longer than a chunk is split into token windows.
+    """
+    window = []  # (start, end, token count) of the sentences in the chunk
+    window_tokens = 0
+    fresh = False  # whether the window holds more than carried-over overlap
+
+    def flush():
+        nonlocal window, window_tokens, fresh
+        fresh = False
+        chunk = text[window[0][0]:window[-1][1]]
+        # Keep whole trailing sentences as overlap
+        kept, kept_tokens = [], 0
+        for sentence in reversed(window):
+            if kept_tokens + sentence[2] > overlap_tokens:
+                break
+            kept.insert(0, sentence)
+            kept_tokens += sentence[2]
+        window, window_tokens = kept, kept_tokens
+        return chunk
+
+    for start, end in iter_sentences(text):
+        tokens = encoding.encode(text[start:end])
+
+        if len(tokens) > chunk_tokens:
+            if fresh:
+                yield flush()
+            window, window_tokens = [], 0
+            step = max(1, chunk_tokens - overlap_tokens)
+            for offset in range(0, len(tokens), step):
+                yield encoding.decode(tokens[offset:offset + chunk_tokens])
+                if offset + chunk_tokens >= len(tokens):
+                    break
+            continue
+
+        if fresh and window_tokens + len(tokens) > chunk_tokens:
+            yield flush()
+        # Drop carried-over sentences that would push the chunk over the limit
+        while window and window_tokens + len(tokens) > chunk_tokens:
+            window_tokens -= window.pop(0)[2]
+        window.append((start, end, len(tokens)))
+        window_tokens += len(tokens)
+        fresh = True
+
+    if fresh:
+        yield flush()
+
+def iter_chunks(
+    text: str,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap_tokens: int = DEFAULT_CHUNK_OVERLAP_TOKENS,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    model: str = DEFAULT_EMBEDDING_MODEL,
+    tokenizer_path: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily split text into chunks for embedding.
+
+    Chunk sizes are counted in ``model``'s tokens, or in those of the local
+    model whose ``tokenizer.json`` is at ``tokenizer_path``, and never exceed
+    ``max_tokens`` (the embedding input limit). Chunks break at sentence
+    boundaries and never span sections, since each section is chunked
+    separately. Text that fits in one chunk is yielded as 'Full Content'.
+    """
+    chunk_tokens = max(1, min(chunk_tokens, max_tokens))
+    overlap_tokens = max(0, min(overlap_tokens, chunk_tokens - 1))
+    encoding = get_encoding(model, tokenizer_path)
+
+    # Hold one chunk back to know whether the text produced only one
+    previous = None
+    order = 0
+    for chunk in _iter_chunk_texts(text, encoding, chunk_tokens, overlap_tokens):
+        if previous is not None:
+            yield _make_chunk(previous, order)
+            order += 1
+        previous = chunk
+
+    if previous is None:
+        previous = text
+    yield _make_chunk(previous, order, 'Full Content' if order == 0 else None)
+
+def chunk_text(text: str, **options) -> List[Dict[str, Any]]:
+    """Split text into chunks for embedding (see ``iter_chunks``)."""
+    return list(iter_chunks(text, **options))
+
+# =============================================================================
+# PAGE PARSING
+# =============================================================================
+
+def iter_page(html_content: str, **chunk_options) -> Iterator[Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]]:
+    """Yield each section of a page with a lazy iterator over its chunks."""
+    for section_data in parse_html_sections(html_content):
+        yield section_data, iter_chunks(section_data['text_content'], **chunk_options)
+
+def parse_page(html_content: str, **chunk_options) -> ParsedPage:
+    """Split a page into sections and each section's text into chunks."""
+    return [
+        (section_data, list(chunks))
+        for section_data, chunks in iter_page(html_content, **chunk_options)
+    ]
+
+def parse_html_file(path: str, chunk_options: Optional[Dict[str, Any]] = None) -> Tuple[bytes, ParsedPage]:
+    """Read and parse one HTML file; the process-pool entry point."""
+    raw_content = Path(path).read_bytes()
+    return raw_content, parse_page(raw_content.decode('utf-8'), **(chunk_options or {}))
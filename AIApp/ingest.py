@@ -0,0 +1,380 @@
+"""
+HTML ingestion: parse pages into sections and chunks, embed the chunks and
+store the Project/Page/Section/Chunk hierarchy.
+
+Shared by the crew's save_html_to_database_with_embeddings tool and the
+populate_vector_db management command, which both go through ``ingest_page``:
+a page tree is written with one set-based upsert per level in a single
+transaction.
+"""
+
+import logging
+from datetime import timedelta
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .html_parsing import ParsedPage, iter_page
+from .models import Project, Page, Section, Chunk
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# BULK UPSERT
+# =============================================================================
+
+PROJECT_UPDATE_FIELDS = ['project_name', 'description', 'html_file_path', 'is_active', 'updated_at']
+PAGE_UPDATE_FIELDS = ['page_name', 'page_type', 'html_content', 'is_active', 'updated_at']
+SECTION_UPDATE_FIELDS = ['section_name', 'section_type', 'html_content', 'order', 'is_active', 'updated_at']
+CHUNK_UPDATE_FIELDS = [
+    'chunk_name', 'html_content', 'text_content', 'embedding', 'embedding_status', 'embedding_attempts',
+    'chunk_size', 'order', 'is_active', 'updated_at'
+]
+# Chunks whose text (and so embedding) is unchanged only move or get renamed
+KEPT_CHUNK_UPDATE_FIELDS = ['chunk_name', 'html_content', 'chunk_size', 'order', 'is_active', 'updated_at']
+
+UPSERT_BATCH_SIZE = 500
+
+
+@transaction.atomic
+def upsert_page_tree(
+    project_data: Dict[str, Any],
+    page_data: Dict[str, Any],
+    sections_data: List[Dict[str, Any]],
+    chunks: List[Tuple[str, Dict[str, Any], List[float]]],
+    kept_chunks: Sequence[Tuple[str, Dict[str, Any]]] = ()
+) -> Page:
+    """
+    Replace a page's section/chunk tree (creating or updating its project
+    and the page itself) in one transaction, with one
+    ``INSERT ... ON CONFLICT DO UPDATE`` per level.
+
+    Primary keys come back from each upsert, so foreign keys are resolved
+    in memory instead of being looked up row by row. Sections and chunks of
+    the page that are not part of the new tree are deleted.
+
+    Args:
+        project_data: Project fields, keyed by ``project_id``
+        page_data: Page fields, keyed by ``page_id`` within the project
+        sections_data: Section dicts as returned by ``parse_html_sections``
+        chunks: (section_id, chunk dict from ``chunk_text``, embedding) triples;
+            a ``None`` embedding saves the chunk as pending for embedding_worker
+        kept_chunks: (section_id, chunk dict) pairs of chunks already stored
+            with an embedding; only their name, HTML and position are updated
+
+    Returns:
+        The saved page
+    """
+    [project] = Project.objects.bulk_create(
+        [Project(**project_data)],
+        update_conflicts=True,
+        unique_fields=['project_id'],
+        update_fields=PROJECT_UPDATE_FIELDS
+    )
+
+    [page] = Page.objects.bulk_create(
+        [Page(project=project, **page_data)],
+        update_conflicts=True,
+        unique_fields=['project', 'page_id'],
+        update_fields=PAGE_UPDATE_FIELDS
+    )
+
+    sections = Section.objects.bulk_create(
+        [
+            Section(
+                page=page,
+                section_id=section_data['section_id'],
+                section_name=section_data['section_name'],
+                section_type=section_data['section_type'],
+                html_content=section_data['html_content'],
+                order=section_data['order']
+            )
+            for section_data in sections_data
+        ],
+        update_conflicts=True,
+        unique_fields=['page', 'section_id'],
+        update_fields=SECTION_UPDATE_FIELDS,
+        batch_size=UPSERT_BATCH_SIZE
+    )
+    sections_by_id = {section.section_id: section for section in sections}
+    Section.objects.filter(page=page).exclude(pk__in=[section.pk for section in sections]).delete()
+
+    # A statement may not upsert the same key twice; identical chunk text
+    # within a section yields the same chunk_id, so keep the first
+    def build_chunks(triples):
+        chunk_objects = {}
+        for section_id, chunk_data, embedding in triples:
+            key = (section_id, chunk_data['chunk_id'])
+            if key not in chunk_objects:
+                chunk_objects[key] = Chunk(
+                    section=sections_by_id[section_id],
+                    chunk_id=chunk_data['chunk_id'],
+                    chunk_name=chunk_data['chunk_name'],
+                    html_content=chunk_data['html_content'],
+                    text_content=chunk_data['text_content'],
+                    embedding=embedding,
+                    embedding_status='ready' if embedding is not None else 'pending',
+                    embedding_attempts=0,
+                    chunk_size=chunk_data['chunk_size'],
+                    order=chunk_data['order']
+                )
+        return list(chunk_objects.values())
+
+    saved = Chunk.objects.bulk_create(
+        build_chunks(chunks),
+        update_conflicts=True,
+        unique_fields=['section', 'chunk_id'],
+        update_fields=CHUNK_UPDATE_FIELDS,
+        batch_size=UPSERT_BATCH_SIZE
+    )
+    # A kept chunk deleted in the meantime is re-inserted as pending
+    saved += Chunk.objects.bulk_create(
+        build_chunks([(section_id, chunk_data, None) for section_id, chunk_data in kept_chunks]),
+        update_conflicts=True,
+        unique_fields=['section', 'chunk_id'],
+        update_fields=KEPT_CHUNK_UPDATE_FIELDS,
+        batch_size=UPSERT_BATCH_SIZE
+    )
+    Chunk.objects.filter(section__page=page).exclude(pk__in=[chunk.pk for chunk in saved]).delete()
+
+    return page
+
+# =============================================================================
+# PAGE INGESTION
+# =============================================================================
+
+def get_chunk_options() -> Dict[str, Any]:
+    """Chunker arguments from ``VECTOR_SEARCH_SETTINGS``."""
+    from .pg_vector import get_search_setting
+    max_tokens = get_search_setting('MAX_TEXT_LENGTH', 8000)
+    tokenizer_path = None
+    if get_search_setting('EMBEDDING_PROVIDER', 'openai') == 'onnx':
+        # Local models truncate their input at ONNX_MAX_LENGTH of their own tokens
+        max_tokens = min(max_tokens, get_search_setting('ONNX_MAX_LENGTH', 256))
+        tokenizer_path = get_search_setting('ONNX_TOKENIZER_PATH')
+    return {
+        'chunk_tokens': get_search_setting('CHUNK_TOKENS', 256),
+        'overlap_tokens': get_search_setting('CHUNK_OVERLAP_TOKENS', 50),
+        'max_tokens': max_tokens,
+        'model': get_search_setting('EMBEDDING_MODEL', 'text-embedding-3-small'),
+        'tokenizer_path': tokenizer_path,
+    }
+
+
+def ingest_page(
+    project_data: Dict[str, Any],
+    page_data: Dict[str, Any],
+    parsed: Optional[ParsedPage] = None,
+    defer_embeddings: bool = False
+) -> Dict[str, int]:
+    """
+    Split a page into sections and chunks, embed the chunks and upsert the
+    whole Project/Page/Section/Chunk tree.
+
+    Chunk ids are hashes of the chunk text, so chunks already saved with an
+    embedding keep it and only get their name and position refreshed.
+    Sections and chunks no longer in the page are deleted. The remaining
+    chunk texts are embedded together
+    through ``embeddings.embed_documents_with_store``, which serves text seen
+    before from the embedding store and batches the rest. Embedding happens
+    before the write transaction is opened.
+
+    Args:
+        project_data: project_id, project_name, description, html_file_path
+        page_data: page_id, page_name, page_type, html_content
+        parsed: ``parse_page`` output for the page, when it was already
+            parsed elsewhere (e.g. in a worker process)
+        defer_embeddings: Save new chunks as pending and leave embedding
+            them to ``manage.py embedding_worker`` instead of waiting here
+
+    Returns:
+        Counts of saved sections and chunks, and of reused and computed
+        embeddings
+    """
+    from .embeddings import embed_documents_with_store
+
+    existing_chunks = set(
+        Chunk.objects.filter(
+            section__page__project__project_id=project_data['project_id'],
+            section__page__page_id=page_data['page_id'],
+            embedding__isnull=False
+        ).values_list('section__section_id', 'chunk_id')
+    )
+    
+    # Parse sections lazily and keep only the chunks that still need an embedding
+    if parsed is None:
+        parsed = iter_page(page_data['html_content'], **get_chunk_options())
+    
+    sections_data = []
+    total_chunks = 0
+    pending_chunks = []
+    kept_chunks = []
+    for section_data, chunks_data in parsed:
+        sections_data.append(section_data)
+        section_chunks = 0
+        for chunk_data in chunks_data:
+            section_chunks += 1
+            key = (section_data['section_id'], chunk_data['chunk_id'])
+            if key in existing_chunks:
+                kept_chunks.append((section_data['section_id'], chunk_data))
+            else:
+                pending_chunks.append((section_data['section_id'], chunk_data))
+        print(f"📦 Created {section_chunks} chunks for section: {section_data['section_name']}")
+        total_chunks += section_chunks
+    print(f"📄 Found {len(sections_data)} sections in HTML")
+    
+    unchanged = len(kept_chunks)
+    if defer_embeddings:
+        embeddings, counts = [None] * len(pending_chunks), {'reused': 0, 'computed': 0}
+        print(f"⏳ Queued {len(pending_chunks)} chunks for embedding_worker")
+    else:
+        embeddings, counts = embed_documents_with_store(
+            [chunk_data['text_content'] for _, chunk_data in pending_chunks]
+        )
+    print(
+        f"🧠 Embeddings: {unchanged + counts['reused']} reused "
+        f"({unchanged} unchanged chunks), {counts['computed']} computed"
+    )
+    
+    upsert_page_tree(
+        project_data,
+        page_data,
+        sections_data,
+        [(section_id, chunk_data, embedding) for (section_id, chunk_data), embedding in zip(pending_chunks, embeddings)],
+        kept_chunks
+    )
+    print(f"✅ Saved page {page_data['page_id']} with {len(sections_data)} sections")
+    
+    return {
+        'sections': len(sections_data),
+        'chunks': total_chunks,
+        'reused_embeddings': unchanged + counts['reused'],
+        'computed_embeddings': counts['computed'],
+        'pending_embeddings': len(pending_chunks) if defer_embeddings else 0,
+    }
+
+# =============================================================================
+# DEFERRED EMBEDDING
+# =============================================================================
+
+def claim_pending_chunks(batch_size: int, lease_seconds: float) -> Tuple[List[Chunk], Any]:
+    """
+    Mark up to ``batch_size`` queued chunks as processing and return them
+    with the claim timestamp.
+
+    Rows are picked with ``SELECT ... FOR UPDATE SKIP LOCKED`` in a short
+    transaction, so concurrent workers never claim the same chunk. Chunks
+    claimed more than ``lease_seconds`` ago (e.g. by a worker that died)
+    are claimed again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        chunks = list(
+            Chunk.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(embedding_status='pending')
+                | Q(embedding_status='processing', embedding_claimed_at__lt=now - timedelta(seconds=lease_seconds))
+            )
+            .only('pk', 'text_content', 'embedding_attempts')
+            .order_by('pk')[:batch_size]
+        )
+        Chunk.objects.filter(pk__in=[chunk.pk for chunk in chunks]).update(
+            embedding_status='processing', embedding_claimed_at=now
+        )
+    return chunks, now
+
+
+def _embed_bisecting(chunks: List[Chunk]) -> Tuple[List[Tuple[Chunk, List[float]]], List[Chunk]]:
+    """
+    Embed ``chunks``, splitting a batch that fails in halves until the
+    failing texts are isolated.
+
+    Returns:
+        ((chunk, embedding) pairs, chunks that failed on their own)
+    """
+    from .embeddings import embed_documents_with_store
+
+    try:
+        embeddings, _ = embed_documents_with_store([chunk.text_content for chunk in chunks])
+        return list(zip(chunks, embeddings)), []
+    except Exception as e:
+        if len(chunks) == 1:
+            logger.warning(f"Embedding chunk {chunks[0].pk} failed: {str(e)}")
+            return [], chunks
+        logger.info(f"Embedding {len(chunks)} chunks failed, retrying in halves: {str(e)}")
+
+    middle = len(chunks) // 2
+    embedded, failed = _embed_bisecting(chunks[:middle])
+    embedded_rest, failed_rest = _embed_bisecting(chunks[middle:])
+    return embedded + embedded_rest, failed + failed_rest
+
+
+def embed_pending_chunks(
+    batch_size: int = 64,
+    max_attempts: Optional[int] = None,
+    lease_seconds: Optional[float] = None
+) -> Dict[str, int]:
+    """
+    Claim up to ``batch_size`` pending chunks and embed them.
+
+    Chunks are claimed in one short transaction (see
+    ``claim_pending_chunks``), embedded with no transaction or row lock
+    held, and written back in a second one. Results are only saved for
+    chunks that are still held under this claim. A failing batch is
+    bisected so only the chunks that fail on their own have their attempt
+    count bumped; they go back to the queue, or are marked failed once
+    they reach ``max_attempts`` (default ``EMBEDDING_MAX_ATTEMPTS``).
+
+    Returns:
+        Counts of claimed, embedded and failed chunks
+    """
+    from .pg_vector import get_search_setting
+    if max_attempts is None:
+        max_attempts = get_search_setting('EMBEDDING_MAX_ATTEMPTS', 5)
+    if lease_seconds is None:
+        lease_seconds = get_search_setting('EMBEDDING_LEASE_SECONDS', 600)
+
+    chunks, claimed_at = claim_pending_chunks(batch_size, lease_seconds)
+    if not chunks:
+        return {'claimed': 0, 'embedded': 0, 'failed': 0}
+
+    embedded, errored = _embed_bisecting(chunks)
+
+    for chunk, embedding in embedded:
+        chunk.embedding = embedding
+        chunk.embedding_status = 'ready'
+        chunk.embedding_claimed_at = None
+
+    failed = 0
+    for chunk in errored:
+        chunk.embedding_attempts += 1
+        chunk.embedding_claimed_at = None
+        if chunk.embedding_attempts >= max_attempts:
+            chunk.embedding_status = 'failed'
+            failed += 1
+        else:
+            chunk.embedding_status = 'pending'
+
+    with transaction.atomic():
+        # Skip chunks re-queued by a re-ingest or taken over after the lease ran out
+        held = set(
+            Chunk.objects.select_for_update()
+            .filter(pk__in=[chunk.pk for chunk in chunks], embedding_status='processing', embedding_claimed_at=claimed_at)
+            .values_list('pk', flat=True)
+        )
+        Chunk.objects.bulk_update(
+            [chunk for chunk, _ in embedded if chunk.pk in held],
+            ['embedding', 'embedding_status', 'embedding_claimed_at']
+        )
+        Chunk.objects.bulk_update(
+            [chunk for chunk in errored if chunk.pk in held],
+            ['embedding_attempts', 'embedding_status', 'embedding_claimed_at']
+        )
+
+    if errored:
+        logger.error(f"Failed to embed {len(errored)} of {len(chunks)} claimed chunks")
+
+    return {'claimed': len(chunks), 'embedded': len(embedded), 'failed': failed}
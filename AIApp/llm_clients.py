@@ -0,0 +1,111 @@
+"""
+Shared OpenAI clients for every chat, generation and embedding call site.
+
+One ``httpx.Client`` with a keep-alive connection pool and explicit
+connect/read timeouts is created per process and reused by the raw
+``openai.OpenAI`` client and by the LangChain chat and embedding models, so
+TLS handshakes and client construction stay off the request path. Models are
+cached per (model, options), and ``model_slot`` bounds how many calls to one
+model run at once in this process (``MODEL_CONCURRENCY``).
+
+Async clients are bound to the event loop they first run on, so batch jobs
+create one per run with ``create_async_openai_client`` (same pool limits and
+timeouts) and close it when done.
+"""
+
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict
+
+import httpx
+import openai
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from .pg_vector import get_search_setting
+
+_slots: Dict[str, threading.BoundedSemaphore] = {}
+_slots_lock = threading.Lock()
+
+
+def get_timeout() -> httpx.Timeout:
+    """Read timeout bounds each wait for response bytes, including between streamed events."""
+    return httpx.Timeout(
+        get_search_setting('OPENAI_READ_TIMEOUT', 300.0),
+        connect=get_search_setting('OPENAI_CONNECT_TIMEOUT', 5.0)
+    )
+
+
+def get_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=get_search_setting('OPENAI_MAX_CONNECTIONS', 20),
+        max_keepalive_connections=get_search_setting('OPENAI_MAX_KEEPALIVE_CONNECTIONS', 10),
+        keepalive_expiry=get_search_setting('OPENAI_KEEPALIVE_EXPIRY', 60.0)
+    )
+
+
+def get_max_retries() -> int:
+    return get_search_setting('OPENAI_MAX_RETRIES', 2)
+
+
+@lru_cache(maxsize=None)
+def get_http_client() -> httpx.Client:
+    """Process-wide pooled HTTP client used by every sync OpenAI call."""
+    return httpx.Client(timeout=get_timeout(), limits=get_limits())
+
+
+@lru_cache(maxsize=None)
+def get_openai_client() -> openai.OpenAI:
+    return openai.OpenAI(
+        http_client=get_http_client(),
+        timeout=get_timeout(),
+        max_retries=get_max_retries()
+    )
+
+
+def create_async_openai_client() -> openai.AsyncOpenAI:
+    """New async client for the running event loop; the caller closes it."""
+    return openai.AsyncOpenAI(
+        http_client=httpx.AsyncClient(timeout=get_timeout(), limits=get_limits()),
+        timeout=get_timeout(),
+        max_retries=get_max_retries()
+    )
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(model: str, temperature: float = 0) -> ChatOpenAI:
+    """Shared LangChain chat model for ``model``."""
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        http_client=get_http_client(),
+        timeout=get_timeout(),
+        max_retries=get_max_retries()
+    )
+
+
+@lru_cache(maxsize=None)
+def get_embeddings_model(model: str) -> OpenAIEmbeddings:
+    """Shared LangChain embeddings client for ``model``."""
+    return OpenAIEmbeddings(
+        model=model,
+        http_client=get_http_client(),
+        timeout=get_timeout(),
+        max_retries=get_max_retries()
+    )
+
+
+def get_model_concurrency(model: str) -> int:
+    limits = get_search_setting('MODEL_CONCURRENCY', {})
+    return limits.get(model, limits.get('default', 4))
+
+
+@contextmanager
+def model_slot(model: str):
+    """Hold one of ``model``'s concurrency slots for the duration of a call."""
+    with _slots_lock:
+        slots = _slots.get(model)
+        if slots is None:
+            slots = _slots[model] = threading.BoundedSemaphore(get_model_concurrency(model))
+    with slots:
+        yield
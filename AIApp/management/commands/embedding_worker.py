@@ -0,0 +1,86 @@
+"""
+Django management command that embeds chunks saved as pending.
+
+Chunks written with deferred embeddings (e.g. by the crew's
+save_html_to_database_with_embeddings tool) are claimed in batches with
+SELECT ... FOR UPDATE SKIP LOCKED, so indexing scales by starting more
+worker processes.
+
+Usage:
+    python manage.py embedding_worker
+    python manage.py embedding_worker --batch-size 128
+    python manage.py embedding_worker --once
+"""
+
+import logging
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from AIApp.ingest import embed_pending_chunks
+from AIApp.pg_vector import get_search_setting
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Embed pending chunks; run several workers to index in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=get_search_setting('EMBEDDING_WORKER_BATCH_SIZE', 64),
+            help='Chunks claimed and embedded per batch'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=get_search_setting('EMBEDDING_WORKER_POLL_INTERVAL', 5.0),
+            help='Seconds to wait when the queue is empty'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=get_search_setting('EMBEDDING_MAX_ATTEMPTS', 5),
+            help='Failed attempts before a chunk is marked failed'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling'
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        logging.basicConfig(level=logging.INFO)
+        embedded = failed = 0
+
+        self.stdout.write(f"Embedding worker started (batch size {options['batch_size']})")
+
+        try:
+            while True:
+                close_old_connections()
+                counts = embed_pending_chunks(options['batch_size'], options['max_attempts'])
+                embedded += counts['embedded']
+                failed += counts['failed']
+
+                if counts['claimed']:
+                    self.stdout.write(
+                        f"Embedded {counts['embedded']}/{counts['claimed']} chunks "
+                        f"(total {embedded} embedded, {failed} failed)"
+                    )
+                    if not counts['embedded']:
+                        # Back off before retrying a batch that failed
+                        time.sleep(options['poll_interval'])
+                    continue
+
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping embedding worker")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Embedding worker finished: {embedded} embedded, {failed} failed")
+        )
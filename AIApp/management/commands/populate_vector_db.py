@@ -9,6 +9,7 @@ Usage:
     python manage.py populate_vector_db --portfolio-dir /path/to/portfolio
     python manage.py populate_vector_db --category Hero
     python manage.py populate_vector_db --clear-existing
+    python manage.py populate_vector_db --incremental
 """
 
 import os
@@ -16,7 +17,7 @@ import logging
 from pathlib import Path
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from AIApp.pg_vector import HTMLVectorProcessor, HTMLVectorDocument, setup_pgvector_extension
+from AIApp.pg_vector import HTMLVectorProcessor, setup_pgvector_extension
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing vector documents before processing'
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only re-index files that changed since the last run and remove vanished ones'
+        )
         parser.add_argument(
             '--dry-run',
             action='store_true',
@@ -83,7 +89,7 @@ class Command(BaseCommand):
             if options['dry_run']:
                 self.dry_run_processing(portfolio_dir, options['category'])
             else:
-                self.process_files(portfolio_dir, options['category'])
+                self.process_files(portfolio_dir, options['category'], options['incremental'])
                 
         except Exception as e:
             logger.error(f"Command failed: {str(e)}")
@@ -93,8 +99,7 @@ class Command(BaseCommand):
         """Clear existing vector documents."""
         self.stdout.write("Clearing existing vector documents...")
         
-        count = HTMLVectorDocument.objects.count()
-        HTMLVectorDocument.objects.all().delete()
+        count = HTMLVectorProcessor.clear_documents()
         
         self.stdout.write(
             self.style.SUCCESS(f"Cleared {count} existing documents")
@@ -129,7 +134,7 @@ class Command(BaseCommand):
         if category:
             self.stdout.write(f"Filtered by category: {category}")
 
-    def process_files(self, portfolio_dir: str, category: str = None):
+    def process_files(self, portfolio_dir: str, category: str = None, incremental: bool = False):
         """Process HTML files and create vector documents."""
         self.stdout.write(f"Processing HTML files from: {portfolio_dir}")
         
@@ -137,12 +142,12 @@ class Command(BaseCommand):
             self.stdout.write(f"Filtering by category: {category}")
         
         try:
-            # Process the portfolio directory
-            documents = HTMLVectorProcessor.process_portfolio_directory(portfolio_dir)
-            
-            # Filter by category if specified
-            if category:
-                documents = [doc for doc in documents if doc.category == category]
+            # Process the portfolio directory (only the requested category, if any)
+            if incremental:
+                documents, unchanged, removed = HTMLVectorProcessor.sync_portfolio_directory(portfolio_dir, category)
+                self.stdout.write(f"Incremental run: {unchanged} unchanged, {removed} removed")
+            else:
+                documents = HTMLVectorProcessor.process_portfolio_directory(portfolio_dir, category)
             
             # Display results
             self.stdout.write("\nProcessing Results:")
@@ -159,13 +164,19 @@ class Command(BaseCommand):
             for cat, docs in by_category.items():
                 self.stdout.write(f"\n{cat} ({len(docs)} documents):")
                 for doc in docs:
-                    self.stdout.write(f"  ✓ {doc.title} ({doc.file_size} bytes)")
+                    self.stdout.write(
+                        f"  ✓ {doc.title} ({doc.file_size} bytes, {doc.sections} sections, {doc.chunks} chunks)"
+                    )
                     total_processed += 1
             
             self.stdout.write("\n" + "=" * 50)
             self.stdout.write(
                 self.style.SUCCESS(f"Successfully processed {total_processed} documents")
             )
+            self.stdout.write(
+                f"Embeddings reused: {sum(doc.reused_embeddings for doc in documents)}, "
+                f"computed: {sum(doc.computed_embeddings for doc in documents)}"
+            )
             
             # Show statistics
             self.show_statistics()
@@ -185,6 +196,7 @@ class Command(BaseCommand):
             self.stdout.write("-" * 30)
             self.stdout.write(f"Total documents: {stats.get('total_documents', 0)}")
             self.stdout.write(f"Average embedding dimension: {stats.get('avg_embedding_dimension', 0)}")
+            self.stdout.write(f"Chunks pending embedding: {stats.get('pending_chunks', 0)}")
             
             if stats.get('by_category'):
                 self.stdout.write("\nDocuments by category:")
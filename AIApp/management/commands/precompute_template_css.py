@@ -0,0 +1,82 @@
+"""
+Django management command that generates CSS for templates stored without it.
+
+Run it after populating templates so the crew tools never have to generate
+CSS while a request is waiting. Requests run concurrently under a
+requests-per-minute limit and each result is saved as soon as it arrives.
+
+Usage:
+    python manage.py precompute_template_css
+    python manage.py precompute_template_css --concurrency 8 --requests-per-minute 120
+    python manage.py precompute_template_css --dry-run
+"""
+
+import asyncio
+import logging
+from django.core.management.base import BaseCommand
+from AIApp.llm_clients import get_model_concurrency
+from AIApp.pg_vector import get_search_setting
+from AIApp.template_css import CSS_MODEL, precompute_missing_css, templates_missing_css
+
+
+class Command(BaseCommand):
+    help = 'Generate and store CSS for active templates that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=get_model_concurrency(CSS_MODEL),
+            help="Maximum CSS generations in flight (default: the CSS model's MODEL_CONCURRENCY)"
+        )
+        parser.add_argument(
+            '--requests-per-minute',
+            type=int,
+            default=get_search_setting('CSS_REQUESTS_PER_MINUTE', 60),
+            help='Maximum CSS generations started per minute'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Only process this many templates'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the templates without CSS and exit'
+        )
+
+    def handle(self, *args, **options):
+        """Main command handler."""
+        logging.basicConfig(level=logging.INFO)
+
+        queryset = templates_missing_css().order_by('pk')
+        if options['limit']:
+            queryset = queryset[:options['limit']]
+        templates = list(queryset.values('pk', 'name', 'content'))
+
+        if not templates:
+            self.stdout.write(self.style.SUCCESS("Every active template already has CSS"))
+            return
+
+        if options['dry_run']:
+            for template in templates:
+                self.stdout.write(f"  {template['name']}")
+            self.stdout.write(f"{len(templates)} templates without CSS")
+            return
+
+        self.stdout.write(
+            f"Generating CSS for {len(templates)} templates "
+            f"({options['concurrency']} concurrent, {options['requests_per_minute']}/min)"
+        )
+
+        counts = asyncio.run(precompute_missing_css(
+            templates,
+            concurrency=options['concurrency'],
+            requests_per_minute=options['requests_per_minute']
+        ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"CSS generated for {counts['generated']} templates, "
+            f"{counts['skipped']} already had CSS, {counts['failed']} failed"
+        ))
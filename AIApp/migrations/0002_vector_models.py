@@ -0,0 +1,174 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:57
+
+import django.db.models.deletion
+import pgvector.django.vector
+from pgvector.django import VectorExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIApp', '0001_initial'),
+    ]
+
+    operations = [
+        VectorExtension(),
+        migrations.AddField(
+            model_name='portfoliotemplate',
+            name='content',
+            field=models.TextField(default='', help_text='The full HTML, CSS, and JavaScript code for the component'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='portfoliotemplate',
+            name='css_content',
+            field=models.TextField(blank=True, help_text='The CSS content specific to this template section', null=True),
+        ),
+        migrations.AddField(
+            model_name='portfoliotemplate',
+            name='embedding',
+            field=pgvector.django.vector.VectorField(default=None, dimensions=1536),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='Project',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_id', models.CharField(help_text='Unique identifier for the project', max_length=100, unique=True)),
+                ('project_name', models.CharField(help_text='Human-readable name for the project', max_length=200)),
+                ('description', models.TextField(blank=True, help_text='Description of the project', null=True)),
+                ('html_file_path', models.CharField(help_text='Path to the main HTML file', max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'HTML Project',
+                'verbose_name_plural': 'HTML Projects',
+                'db_table': 'html_projects',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['project_id'], name='html_projec_project_05d860_idx'), models.Index(fields=['is_active'], name='html_projec_is_acti_3181c9_idx'), models.Index(fields=['created_at'], name='html_projec_created_ea3409_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Page',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_id', models.CharField(help_text='Unique identifier for the page within the project', max_length=100)),
+                ('page_name', models.CharField(help_text='Human-readable name for the page', max_length=200)),
+                ('page_type', models.CharField(choices=[('home', 'Home'), ('about', 'About'), ('portfolio', 'Portfolio'), ('contact', 'Contact'), ('blog', 'Blog'), ('services', 'Services'), ('other', 'Other')], default='other', help_text='Type of the page', max_length=50)),
+                ('html_content', models.TextField(help_text='The HTML content of the page')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('project', models.ForeignKey(help_text='The project this page belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='AIApp.project')),
+            ],
+            options={
+                'verbose_name': 'HTML Page',
+                'verbose_name_plural': 'HTML Pages',
+                'db_table': 'html_pages',
+                'ordering': ['project', 'page_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Section',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section_id', models.CharField(help_text='Unique identifier for the section within the page', max_length=100)),
+                ('section_name', models.CharField(help_text='Human-readable name for the section', max_length=200)),
+                ('section_type', models.CharField(choices=[('header', 'Header'), ('hero', 'Hero'), ('about', 'About'), ('portfolio', 'Portfolio'), ('skills', 'Skills'), ('experience', 'Experience'), ('contact', 'Contact'), ('footer', 'Footer'), ('other', 'Other')], default='other', help_text='Type of the section', max_length=50)),
+                ('html_content', models.TextField(help_text='The HTML content of the section')),
+                ('order', models.PositiveIntegerField(default=0, help_text='Order of the section within the page')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('page', models.ForeignKey(help_text='The page this section belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='sections', to='AIApp.page')),
+            ],
+            options={
+                'verbose_name': 'HTML Section',
+                'verbose_name_plural': 'HTML Sections',
+                'db_table': 'html_sections',
+                'ordering': ['page', 'order', 'section_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Chunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chunk_id', models.CharField(help_text='Unique identifier for the chunk within the section', max_length=100)),
+                ('chunk_name', models.CharField(help_text='Human-readable name for the chunk', max_length=200)),
+                ('html_content', models.TextField(help_text='The HTML content of the chunk')),
+                ('text_content', models.TextField(help_text='The plain text content extracted from HTML for embedding')),
+                ('embedding', pgvector.django.vector.VectorField(dimensions=1536, help_text='Vector embedding of the chunk content')),
+                ('chunk_size', models.PositiveIntegerField(help_text='Size of the chunk in characters')),
+                ('order', models.PositiveIntegerField(default=0, help_text='Order of the chunk within the section')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('section', models.ForeignKey(help_text='The section this chunk belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='AIApp.section')),
+            ],
+            options={
+                'verbose_name': 'HTML Chunk',
+                'verbose_name_plural': 'HTML Chunks',
+                'db_table': 'html_chunks',
+                'ordering': ['section', 'order', 'chunk_id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='page',
+            index=models.Index(fields=['project', 'page_id'], name='html_pages_project_98d1b2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='page',
+            index=models.Index(fields=['page_type'], name='html_pages_page_ty_31c731_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='page',
+            index=models.Index(fields=['is_active'], name='html_pages_is_acti_bcc4ea_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='page',
+            unique_together={('project', 'page_id')},
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['page', 'section_id'], name='html_sectio_page_id_c82cba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['section_type'], name='html_sectio_section_2fdcbe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['order'], name='html_sectio_order_a2bfab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['is_active'], name='html_sectio_is_acti_c52caf_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='section',
+            unique_together={('page', 'section_id')},
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=models.Index(fields=['section', 'chunk_id'], name='html_chunks_section_cb7931_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=models.Index(fields=['chunk_size'], name='html_chunks_chunk_s_824b32_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=models.Index(fields=['order'], name='html_chunks_order_3ba554_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=models.Index(fields=['is_active'], name='html_chunks_is_acti_524267_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='chunk',
+            unique_together={('section', 'chunk_id')},
+        ),
+    ]
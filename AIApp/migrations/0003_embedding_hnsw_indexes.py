@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:57
+
+import pgvector.django.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIApp', '0002_vector_models'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chunk',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='html_chunks_embedding_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='portfolio_t_embedding_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+    ]
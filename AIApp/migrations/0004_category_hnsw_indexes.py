@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:58
+
+import pgvector.django.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIApp', '0003_embedding_hnsw_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Hero'), ('is_active', True)), ef_construction=64, fields=['embedding'], m=16, name='portfolio_t_hero_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'About'), ('is_active', True)), ef_construction=64, fields=['embedding'], m=16, name='portfolio_t_about_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Skills'), ('is_active', True)), ef_construction=64, fields=['embedding'], m=16, name='portfolio_t_skills_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Projects'), ('is_active', True)), ef_construction=64, fields=['embedding'], m=16, name='portfolio_t_projects_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Testimonials'), ('is_active', True)), ef_construction=64, fields=['embedding'], m=16, name='portfolio_t_testimonials_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Contact'), ('is_active', True)), ef_construction=64, fields=['embedding'], m=16, name='portfolio_t_contact_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Footer'), ('is_active', True)), ef_construction=64, fields=['embedding'], m=16, name='portfolio_t_footer_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:02
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIApp', '0004_category_hnsw_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunk',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('text_content', config='english'), help_text='Full-text search vector over the chunk text', output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddField(
+            model_name='portfoliotemplate',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('display_name', 'description', config='english'), help_text='Full-text search vector over display name and description', output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='html_chunks_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='portfolio_t_search_gin'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:05
+
+import django.db.models.functions.comparison
+import pgvector.django.bit
+import pgvector.django.halfvec
+import pgvector.django.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIApp', '0005_search_vectors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunk',
+            name='embedding_binary',
+            field=models.GeneratedField(db_persist=True, expression=models.Func('embedding', function='binary_quantize', output_field=pgvector.django.bit.BitField(length=1536)), help_text='Binary-quantized copy of the embedding', output_field=pgvector.django.bit.BitField(length=1536)),
+        ),
+        migrations.AddField(
+            model_name='chunk',
+            name='embedding_half',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast('embedding', pgvector.django.halfvec.HalfVectorField(dimensions=1536)), help_text='Half-precision copy of the embedding', output_field=pgvector.django.halfvec.HalfVectorField(dimensions=1536)),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding_half'], m=16, name='html_chunks_half_hnsw', opclasses=['halfvec_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding_binary'], m=16, name='html_chunks_binary_hnsw', opclasses=['bit_hamming_ops']),
+        ),
+    ]
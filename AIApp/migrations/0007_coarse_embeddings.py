@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:06
+
+import pgvector.django.indexes
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIApp', '0006_quantized_chunk_embeddings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunk',
+            name='embedding_coarse',
+            field=models.GeneratedField(db_persist=True, expression=models.Func('embedding', models.Value(1), models.Value(256), function='subvector', output_field=pgvector.django.vector.VectorField(dimensions=256)), help_text='Truncated embedding used for the coarse search stage', output_field=pgvector.django.vector.VectorField(dimensions=256)),
+        ),
+        migrations.AddField(
+            model_name='portfoliotemplate',
+            name='embedding_coarse',
+            field=models.GeneratedField(db_persist=True, expression=models.Func('embedding', models.Value(1), models.Value(256), function='subvector', output_field=pgvector.django.vector.VectorField(dimensions=256)), help_text='Truncated embedding used for the coarse search stage', output_field=pgvector.django.vector.VectorField(dimensions=256)),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding_coarse'], m=16, name='html_chunks_coarse_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding_coarse'], m=16, name='portfolio_t_coarse_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Hero'), ('is_active', True)), ef_construction=64, fields=['embedding_coarse'], m=16, name='pt_coarse_hero_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'About'), ('is_active', True)), ef_construction=64, fields=['embedding_coarse'], m=16, name='pt_coarse_about_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Skills'), ('is_active', True)), ef_construction=64, fields=['embedding_coarse'], m=16, name='pt_coarse_skills_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Projects'), ('is_active', True)), ef_construction=64, fields=['embedding_coarse'], m=16, name='pt_coarse_projects_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Testimonials'), ('is_active', True)), ef_construction=64, fields=['embedding_coarse'], m=16, name='pt_coarse_testimonials_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Contact'), ('is_active', True)), ef_construction=64, fields=['embedding_coarse'], m=16, name='pt_coarse_contact_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliotemplate',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('category__iexact', 'Footer'), ('is_active', True)), ef_construction=64, fields=['embedding_coarse'], m=16, name='pt_coarse_footer_hnsw', opclasses=['vector_cosine_ops']),
+        ),
+    ]
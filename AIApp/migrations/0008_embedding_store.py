@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:07
+
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIApp', '0007_coarse_embeddings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the embedded text', max_length=64)),
+                ('model', models.CharField(help_text='Embedding model that produced the vector', max_length=100)),
+                ('embedding', pgvector.django.vector.VectorField(help_text='Vector embedding of the text')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Stored Embedding',
+                'verbose_name_plural': 'Stored Embeddings',
+                'db_table': 'embedding_store',
+                'unique_together': {('content_hash', 'model')},
+            },
+        ),
+    ]
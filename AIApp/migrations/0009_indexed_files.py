@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIApp', '0008_embedding_store'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(help_text='File path relative to the portfolio directory', max_length=500, unique=True)),
+                ('category', models.CharField(help_text='Portfolio category the file was indexed under', max_length=100)),
+                ('mtime', models.FloatField(help_text='File modification time when indexed')),
+                ('size', models.PositiveBigIntegerField(help_text='File size in bytes when indexed')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the file content when indexed', max_length=64)),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Indexed File',
+                'verbose_name_plural': 'Indexed Files',
+                'db_table': 'indexed_files',
+                'ordering': ['path'],
+                'indexes': [models.Index(fields=['category'], name='indexed_fil_categor_a58fa5_idx')],
+            },
+        ),
+    ]
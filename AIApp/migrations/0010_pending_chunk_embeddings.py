@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:13
+
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIApp', '0009_indexed_files'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chunk',
+            name='embedding_attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Failed embedding attempts by embedding_worker'),
+        ),
+        migrations.AddField(
+            model_name='chunk',
+            name='embedding_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', help_text='Whether the embedding is computed, queued for embedding_worker or failed', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='chunk',
+            name='embedding',
+            field=pgvector.django.vector.VectorField(blank=True, dimensions=1536, help_text='Vector embedding of the chunk content (empty while pending)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=models.Index(condition=models.Q(('embedding_status', 'pending')), fields=['id'], name='html_chunks_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AIApp', '0010_pending_chunk_embeddings'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chunk',
+            name='html_chunks_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='chunk',
+            name='embedding_claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When embedding_worker claimed the chunk; stale claims are taken over', null=True),
+        ),
+        migrations.AlterField(
+            model_name='chunk',
+            name='embedding_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', help_text='Whether the embedding is computed, queued for or claimed by embedding_worker, or failed', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='chunk',
+            index=models.Index(condition=models.Q(('embedding_status__in', ['pending', 'processing'])), fields=['id'], name='html_chunks_pending_idx'),
+        ),
+    ]
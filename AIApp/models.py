@@ -1,7 +1,34 @@
 from django.db import models
-from pgvector.django import VectorField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models.functions import Cast
+from pgvector.django import BitField, HalfVectorField, VectorField, HnswIndex
 from django.core.exceptions import ValidationError
 
+# Template categories that get their own partial HNSW index
+TEMPLATE_CATEGORIES = ['Hero', 'About', 'Skills', 'Projects', 'Testimonials', 'Contact', 'Footer']
+
+# Leading dimensions kept for the coarse (Matryoshka) search stage;
+# text-embedding-3 vectors stay meaningful when truncated
+COARSE_EMBEDDING_DIMENSIONS = 256
+
+
+def coarse_embedding_field():
+    """Generated column holding the first COARSE_EMBEDDING_DIMENSIONS of `embedding`."""
+    return models.GeneratedField(
+        expression=models.Func(
+            'embedding',
+            models.Value(1),
+            models.Value(COARSE_EMBEDDING_DIMENSIONS),
+            function='subvector',
+            output_field=VectorField(dimensions=COARSE_EMBEDDING_DIMENSIONS)
+        ),
+        output_field=VectorField(dimensions=COARSE_EMBEDDING_DIMENSIONS),
+        db_persist=True,
+        help_text="Truncated embedding used for the coarse search stage"
+    )
+
+
 class PortfolioTemplate(models.Model):
     """
     Model to store portfolio template information with categories, names, 
@@ -41,6 +68,13 @@ class PortfolioTemplate(models.Model):
         help_text="The CSS content specific to this template section"
     )
     embedding = VectorField(dimensions=1536)
+    embedding_coarse = coarse_embedding_field()
+    search_vector = models.GeneratedField(
+        expression=SearchVector('display_name', 'description', config='english'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        help_text="Full-text search vector over display name and description"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -54,7 +88,45 @@ class PortfolioTemplate(models.Model):
         indexes = [
             models.Index(fields=['category']),
             models.Index(fields=['name']),
-            models.Index(fields=['is_active'])
+            models.Index(fields=['is_active']),
+            GinIndex(fields=['search_vector'], name='portfolio_t_search_gin'),
+            # ANN index for `ORDER BY embedding <=> query LIMIT k` lookups
+            HnswIndex(
+                name='portfolio_t_embedding_hnsw',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops']
+            ),
+            # First-stage index of TEMPLATE_COARSE_STAGE='matryoshka'
+            HnswIndex(
+                name='portfolio_t_coarse_hnsw',
+                fields=['embedding_coarse'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops']
+            ),
+        ] + [
+            # Category-scoped ANN indexes so a category lookup only walks its own graph
+            HnswIndex(
+                name=f'portfolio_t_{category.lower()}_hnsw',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+                condition=models.Q(category__iexact=category, is_active=True)
+            )
+            for category in TEMPLATE_CATEGORIES
+        ] + [
+            HnswIndex(
+                name=f'pt_coarse_{category.lower()}_hnsw',
+                fields=['embedding_coarse'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops'],
+                condition=models.Q(category__iexact=category, is_active=True)
+            )
+            for category in TEMPLATE_CATEGORIES
         ]
     
     def __str__(self):
@@ -289,7 +361,57 @@ class Chunk(models.Model):
     
     embedding = VectorField(
         dimensions=1536,
-        help_text="Vector embedding of the chunk content"
+        null=True,
+        blank=True,
+        help_text="Vector embedding of the chunk content (empty while pending)"
+    )
+    
+    embedding_status = models.CharField(
+        max_length=10,
+        choices=[
+            ('pending', 'Pending'),
+            ('processing', 'Processing'),
+            ('ready', 'Ready'),
+            ('failed', 'Failed')
+        ],
+        default='ready',
+        help_text="Whether the embedding is computed, queued for or claimed by embedding_worker, or failed"
+    )
+    
+    embedding_attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Failed embedding attempts by embedding_worker"
+    )
+    
+    embedding_claimed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When embedding_worker claimed the chunk; stale claims are taken over"
+    )
+    
+    embedding_coarse = coarse_embedding_field()
+    
+    # Quantized shadow copies of `embedding` for compact ANN indexes;
+    # results are re-ranked against the full-precision column
+    embedding_half = models.GeneratedField(
+        expression=Cast('embedding', HalfVectorField(dimensions=1536)),
+        output_field=HalfVectorField(dimensions=1536),
+        db_persist=True,
+        help_text="Half-precision copy of the embedding"
+    )
+    
+    embedding_binary = models.GeneratedField(
+        expression=models.Func('embedding', function='binary_quantize', output_field=BitField(length=1536)),
+        output_field=BitField(length=1536),
+        db_persist=True,
+        help_text="Binary-quantized copy of the embedding"
+    )
+    
+    search_vector = models.GeneratedField(
+        expression=SearchVector('text_content', config='english'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        help_text="Full-text search vector over the chunk text"
     )
     
     chunk_size = models.PositiveIntegerField(
@@ -316,6 +438,43 @@ class Chunk(models.Model):
             models.Index(fields=['chunk_size']),
             models.Index(fields=['order']),
             models.Index(fields=['is_active']),
+            # Work queue scanned by embedding_worker
+            models.Index(
+                fields=['id'],
+                name='html_chunks_pending_idx',
+                condition=models.Q(embedding_status__in=['pending', 'processing'])
+            ),
+            GinIndex(fields=['search_vector'], name='html_chunks_search_gin'),
+            # ANN index for `ORDER BY embedding <=> query LIMIT k` lookups
+            HnswIndex(
+                name='html_chunks_embedding_hnsw',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops']
+            ),
+            # Compact first-stage indexes; CHUNK_COARSE_STAGE picks the one searched
+            HnswIndex(
+                name='html_chunks_coarse_hnsw',
+                fields=['embedding_coarse'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_cosine_ops']
+            ),
+            HnswIndex(
+                name='html_chunks_half_hnsw',
+                fields=['embedding_half'],
+                m=16,
+                ef_construction=64,
+                opclasses=['halfvec_cosine_ops']
+            ),
+            HnswIndex(
+                name='html_chunks_binary_hnsw',
+                fields=['embedding_binary'],
+                m=16,
+                ef_construction=64,
+                opclasses=['bit_hamming_ops']
+            ),
         ]
     
     def __str__(self):
@@ -329,4 +488,79 @@ class Chunk(models.Model):
             raise ValidationError("Embedding must have exactly 1536 dimensions.")
 
 
+class StoredEmbedding(models.Model):
+    """
+    Embedding store keyed by content hash and model name.
+    Identical text is embedded once, however many chunks or pages contain it.
+    """
+    
+    content_hash = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of the embedded text"
+    )
+    
+    model = models.CharField(
+        max_length=100,
+        help_text="Embedding model that produced the vector"
+    )
+    
+    # Unsized so vectors from models of any dimension can be stored
+    embedding = VectorField(
+        help_text="Vector embedding of the text"
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'embedding_store'
+        verbose_name = 'Stored Embedding'
+        verbose_name_plural = 'Stored Embeddings'
+        unique_together = ['content_hash', 'model']
+    
+    def __str__(self):
+        return f"{self.model}:{self.content_hash[:12]}"
+
 
+class IndexedFile(models.Model):
+    """
+    Manifest of portfolio files indexed by populate_vector_db.
+    Used by incremental runs to skip unchanged files and drop vanished ones.
+    """
+    
+    path = models.CharField(
+        max_length=500,
+        unique=True,
+        help_text="File path relative to the portfolio directory"
+    )
+    
+    category = models.CharField(
+        max_length=100,
+        help_text="Portfolio category the file was indexed under"
+    )
+    
+    mtime = models.FloatField(
+        help_text="File modification time when indexed"
+    )
+    
+    size = models.PositiveBigIntegerField(
+        help_text="File size in bytes when indexed"
+    )
+    
+    content_hash = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of the file content when indexed"
+    )
+    
+    indexed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'indexed_files'
+        verbose_name = 'Indexed File'
+        verbose_name_plural = 'Indexed Files'
+        ordering = ['path']
+        indexes = [
+            models.Index(fields=['category'])
+        ]
+    
+    def __str__(self):
+        return f"{self.path} ({self.content_hash[:12]})"
@@ -0,0 +1,1100 @@
+"""
+pgvector search engine for the AIApp models.
+
+Covers template lookups for the crew tools, chunk/document search over the
+Project/Page/Section/Chunk hierarchy, indexing of the Portfolio directory
+and index setup for the management commands.
+
+All similarity lookups are written as ``ORDER BY embedding <=> query LIMIT k``
+so that Postgres can answer them from the HNSW indexes declared on
+``PortfolioTemplate.embedding`` and ``Chunk.embedding`` instead of scanning
+every row. With a coarse stage configured for a table, lookups take their
+candidates from its compact index instead and re-rank them.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Func, IntegerField
+from pgvector.django import CosineDistance, HammingDistance, HnswIndex, IvfflatIndex
+from pgvector import HalfVector, Vector
+
+from .models import (
+    COARSE_EMBEDDING_DIMENSIONS, TEMPLATE_CATEGORIES, Chunk, IndexedFile, Page, PortfolioTemplate, Project, Section
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_search_setting(key: str, default=None):
+    """Read a value from ``settings.VECTOR_SEARCH_SETTINGS``."""
+    return getattr(settings, 'VECTOR_SEARCH_SETTINGS', {}).get(key, default)
+
+
+# Compact first-stage index searched per table (see coarse_candidates); None
+# searches the full-precision index directly. Every stage's column and index
+# exist in the schema, so the setting can change without migrating.
+TEMPLATE_COARSE_STAGE = get_search_setting('TEMPLATE_COARSE_STAGE')
+CHUNK_COARSE_STAGE = get_search_setting('CHUNK_COARSE_STAGE')
+
+if TEMPLATE_COARSE_STAGE not in (None, 'matryoshka'):
+    raise ImproperlyConfigured(f"Unsupported TEMPLATE_COARSE_STAGE: {TEMPLATE_COARSE_STAGE!r}")
+if CHUNK_COARSE_STAGE not in (None, 'matryoshka', 'halfvec', 'binary'):
+    raise ImproperlyConfigured(f"Unsupported CHUNK_COARSE_STAGE: {CHUNK_COARSE_STAGE!r}")
+# Zero-padded local vectors are not Matryoshka embeddings: their leading
+# dimensions alone do not rank like the full vector
+if get_search_setting('EMBEDDING_PROVIDER', 'openai') != 'openai' and 'matryoshka' in (TEMPLATE_COARSE_STAGE, CHUNK_COARSE_STAGE):
+    raise ImproperlyConfigured("The 'matryoshka' coarse stage needs EMBEDDING_PROVIDER 'openai'")
+
+
+@contextmanager
+def vector_search_session(min_ef_search: int = 0):
+    """
+    Open a transaction with the ANN search parameters applied.
+
+    ``hnsw.ef_search`` and ``ivfflat.probes`` are set with ``is_local`` so
+    they only affect queries issued inside this block. An HNSW scan returns
+    at most ``ef_search`` rows, so callers fetching more candidates than the
+    configured value pass ``min_ef_search``.
+    """
+    ef_search = max(get_search_setting('HNSW_EF_SEARCH', 40), min_ef_search)
+    probes = get_search_setting('IVFFLAT_PROBES', 10)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('hnsw.ef_search', %s, true), "
+                "set_config('ivfflat.probes', %s, true)",
+                [str(ef_search), str(probes)]
+            )
+        yield
+
+
+# Columns needed to rank and describe a template; the large TextFields are
+# only loaded for the winner (see load_template_content)
+TEMPLATE_LIGHT_FIELDS = ('name', 'category', 'display_name', 'description', 'file_path_template')
+TEMPLATE_HEAVY_FIELDS = ('content', 'css_content')
+# Primary key plus light columns in model field order, as Model.from_db expects
+TEMPLATE_ROW_FIELDS = tuple(
+    field.attname for field in PortfolioTemplate._meta.concrete_fields
+    if field.attname in ('id',) + TEMPLATE_LIGHT_FIELDS
+)
+
+# Words the crew uses for a section that map onto a stored template category
+CATEGORY_ALIASES = {
+    'banner': 'Hero',
+    'introduction': 'About',
+    'intro': 'About',
+    'skill': 'Skills',
+    'expertise': 'Skills',
+    'project': 'Projects',
+    'portfolio': 'Projects',
+    'work': 'Projects',
+    'testimonial': 'Testimonials',
+    'reviews': 'Testimonials',
+    'review': 'Testimonials',
+}
+
+
+def normalize_category(category: Optional[str]) -> Optional[str]:
+    """
+    Map a free-form section name ("Hero Section", "About/Introduction") onto
+    a template category so the query matches a partial HNSW index.
+    Unknown names are returned stripped.
+    """
+    if not category or not category.strip():
+        return None
+
+    words = re.findall(r'[a-z]+', category.lower())
+    for known in TEMPLATE_CATEGORIES:
+        if known.lower() in words:
+            return known
+    for word in words:
+        if word in CATEGORY_ALIASES:
+            return CATEGORY_ALIASES[word]
+
+    return category.strip()
+
+
+def binary_quantize(vector: Sequence[float]) -> str:
+    """Bit string matching pgvector's ``binary_quantize`` (1 for x > 0)."""
+    return ''.join('1' if value > 0 else '0' for value in vector)
+
+
+def coarse_candidates(queryset, stage: str, query_vector: Sequence[float], limit: int):
+    """
+    Subquery selecting the pks of the ``limit`` rows of ``queryset`` nearest
+    to ``query_vector`` according to a compact first-stage index:
+
+    - 'matryoshka': the truncated ``embedding_coarse`` column
+    - 'halfvec': the half-precision ``embedding_half`` column (chunks only)
+    - 'binary': Hamming distance on ``embedding_binary`` (chunks only)
+
+    Callers pass the stage configured for the table (``TEMPLATE_COARSE_STAGE``
+    / ``CHUNK_COARSE_STAGE``).
+    """
+    if stage == 'matryoshka':
+        distance = CosineDistance('embedding_coarse', list(query_vector[:COARSE_EMBEDDING_DIMENSIONS]))
+    elif stage == 'halfvec':
+        distance = CosineDistance('embedding_half', HalfVector(query_vector))
+    elif stage == 'binary':
+        distance = HammingDistance('embedding_binary', binary_quantize(query_vector))
+    else:
+        raise ValueError(f"Unknown coarse search stage: {stage}")
+
+    return queryset.annotate(coarse_distance=distance).order_by('coarse_distance').values('pk')[:limit]
+
+
+def rerank_sql(
+    queryset,
+    stage: str,
+    query_vector: Sequence[float],
+    candidates: int,
+    limit: int,
+    threshold: Optional[float] = None
+) -> Tuple[str, list]:
+    """
+    SQL and params of a two-stage search: take ``candidates`` rows of
+    ``queryset`` from the compact index, then re-rank only those by
+    full-precision cosine distance. Selects ``id`` and ``distance``.
+
+    The candidate query is a MATERIALIZED CTE, so the planner has to run it
+    first instead of walking a full-vector index for the outer ORDER BY.
+    """
+    candidate_sql, candidate_params = coarse_candidates(
+        queryset, stage, query_vector, candidates
+    ).query.sql_with_params()
+    table = connection.ops.quote_name(queryset.model._meta.db_table)
+    max_distance = 1 - threshold if threshold is not None else 2.0
+
+    sql = f"""
+        WITH candidates AS MATERIALIZED ({candidate_sql})
+        SELECT t.id, t.embedding <=> %s::vector AS distance
+        FROM candidates c
+        JOIN {table} t ON t.id = c.pk
+        WHERE (t.embedding <=> %s::vector) <= %s
+        ORDER BY distance
+        LIMIT %s
+    """
+    vector = Vector._to_db(query_vector)
+    return sql, list(candidate_params) + [vector, vector, max_distance, limit]
+
+
+def rerank_candidates(
+    queryset,
+    stage: str,
+    query_vector: Sequence[float],
+    candidates: int,
+    limit: int,
+    threshold: Optional[float] = None
+) -> List[Tuple[int, float]]:
+    """
+    Run ``rerank_sql``.
+
+    Returns:
+        (pk, distance) pairs, best first
+    """
+    sql, params = rerank_sql(queryset, stage, query_vector, candidates, limit, threshold)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def load_ranked(queryset, ranked: Sequence[Tuple[int, float]]) -> list:
+    """Load ``rerank_candidates`` results in rank order, annotated with ``distance``."""
+    rows = queryset.in_bulk([pk for pk, _ in ranked])
+    results = []
+    for pk, distance in ranked:
+        if pk in rows:
+            rows[pk].distance = distance
+            results.append(rows[pk])
+    return results
+
+
+def search_templates(
+    query_vector: List[float],
+    k: int = 1,
+    threshold: Optional[float] = None,
+    fields: Sequence[str] = TEMPLATE_LIGHT_FIELDS,
+    category: Optional[str] = None,
+    fallback_to_global: bool = True
+) -> List[PortfolioTemplate]:
+    """
+    Return up to ``k`` active templates closest to ``query_vector``.
+
+    With ``TEMPLATE_COARSE_STAGE`` set, candidates come from the compact
+    index first (see ``rerank_candidates``).
+
+    Args:
+        query_vector: Query embedding
+        k: Maximum number of templates to return (pushed down as LIMIT)
+        threshold: Minimum cosine similarity, applied in the WHERE clause
+        fields: Columns to load; every other column is deferred
+        category: Restrict the search to one template category
+        fallback_to_global: Search all categories if the category has no hits
+
+    Returns:
+        Templates annotated with ``distance`` and ``similarity``, best first
+    """
+    category = normalize_category(category)
+    coarse_stage = TEMPLATE_COARSE_STAGE
+    candidates = k * get_search_setting('RERANK_OVERSAMPLE', 4) if coarse_stage else k
+
+    def nearest(filtered):
+        if coarse_stage:
+            ranked = rerank_candidates(filtered, coarse_stage, query_vector, candidates, k, threshold)
+            return load_ranked(PortfolioTemplate.objects.only(*fields), ranked)
+        queryset = filtered.only(*fields).annotate(distance=CosineDistance('embedding', query_vector))
+        if threshold is not None:
+            queryset = queryset.filter(distance__lte=1 - threshold)
+        return list(queryset.order_by('distance')[:k])
+
+    active = PortfolioTemplate.objects.filter(is_active=True)
+
+    with vector_search_session(candidates):
+        results = []
+        if category:
+            # Same predicate as the partial index, so the planner can use it
+            results = nearest(active.filter(category__iexact=category))
+            if not results and fallback_to_global:
+                logger.info(f"No '{category}' templates matched, falling back to global search")
+        if not results and (not category or fallback_to_global):
+            results = nearest(active)
+
+    for template in results:
+        template.similarity = 1 - template.distance
+
+    return results
+
+
+def load_template_content(
+    template: PortfolioTemplate,
+    fields: Sequence[str] = TEMPLATE_HEAVY_FIELDS
+) -> PortfolioTemplate:
+    """Load the deferred heavy columns of a selected template in one query."""
+    template.refresh_from_db(fields=list(fields))
+    return template
+
+
+def search_templates_batch(
+    query_vectors: Sequence[List[float]],
+    categories: Sequence[Optional[str]],
+    k: int = 1,
+    threshold: Optional[float] = None,
+    fallback_to_global: bool = True
+) -> List[List[PortfolioTemplate]]:
+    """
+    Run one template search per (query vector, category) pair in a single
+    statement: a UNION ALL of per-query searches, each with its own LIMIT.
+
+    Returns one result list per query, in input order, with the same shape
+    as ``search_templates``. Queries whose category has no hits are retried
+    without the category filter in one more statement.
+    """
+    categories = [normalize_category(category) for category in categories]
+    results = _search_templates_union(query_vectors, categories, k, threshold)
+
+    if fallback_to_global:
+        missing = [i for i, category in enumerate(categories) if category and not results[i]]
+        if missing:
+            logger.info(f"No category hits for {[categories[i] for i in missing]}, falling back to global search")
+            retried = _search_templates_union(
+                [query_vectors[i] for i in missing], [None] * len(missing), k, threshold
+            )
+            for i, templates in zip(missing, retried):
+                results[i] = templates
+
+    return results
+
+
+def _template_search_sql(queryset, query_vector: Sequence[float], k: int, threshold: Optional[float]) -> Tuple[str, list]:
+    """SQL selecting ``id`` and ``distance`` of the ``k`` templates of ``queryset`` nearest to ``query_vector``."""
+    if TEMPLATE_COARSE_STAGE:
+        candidates = k * get_search_setting('RERANK_OVERSAMPLE', 4)
+        return rerank_sql(queryset, TEMPLATE_COARSE_STAGE, query_vector, candidates, k, threshold)
+
+    queryset = queryset.annotate(distance=CosineDistance('embedding', query_vector))
+    if threshold is not None:
+        queryset = queryset.filter(distance__lte=1 - threshold)
+    return queryset.order_by('distance').values_list('id', 'distance')[:k].query.sql_with_params()
+
+
+def _search_templates_union(
+    query_vectors: Sequence[List[float]],
+    categories: Sequence[Optional[str]],
+    k: int,
+    threshold: Optional[float]
+) -> List[List[PortfolioTemplate]]:
+    if not query_vectors:
+        return []
+
+    active = PortfolioTemplate.objects.filter(is_active=True)
+    branches, params = [], []
+    for i, (vector, category) in enumerate(zip(query_vectors, categories)):
+        # Same predicate as the partial index, so each branch walks its own graph
+        queryset = active.filter(category__iexact=category) if category else active
+        branch_sql, branch_params = _template_search_sql(queryset, vector, k, threshold)
+        branches.append(f"SELECT %s AS ord, b.id, b.distance FROM ({branch_sql}) b")
+        params.extend([i, *branch_params])
+
+    quote = connection.ops.quote_name
+    columns = ', '.join(f"t.{quote(field)}" for field in TEMPLATE_ROW_FIELDS)
+    sql = f"""
+        SELECT r.ord, {columns}, r.distance
+        FROM ({' UNION ALL '.join(branches)}) r
+        JOIN {quote(PortfolioTemplate._meta.db_table)} t ON t.id = r.id
+        ORDER BY r.ord, r.distance
+    """
+
+    results = [[] for _ in query_vectors]
+    candidates = k * get_search_setting('RERANK_OVERSAMPLE', 4) if TEMPLATE_COARSE_STAGE else k
+    with vector_search_session(candidates):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+    for row in rows:
+        template = PortfolioTemplate.from_db(connection.alias, list(TEMPLATE_ROW_FIELDS), row[1:-1])
+        template.distance = row[-1]
+        template.similarity = 1 - template.distance
+        results[row[0]].append(template)
+
+    return results
+
+
+def load_templates_content(
+    templates: Sequence[PortfolioTemplate],
+    fields: Sequence[str] = TEMPLATE_HEAVY_FIELDS
+) -> Sequence[PortfolioTemplate]:
+    """Load the deferred heavy columns of several templates in one query."""
+    rows = PortfolioTemplate.objects.filter(
+        pk__in=[template.pk for template in templates]
+    ).values('pk', *fields)
+    by_pk = {row['pk']: row for row in rows}
+
+    for template in templates:
+        row = by_pk.get(template.pk, {})
+        for field in fields:
+            setattr(template, field, row.get(field))
+
+    return templates
+
+
+# =============================================================================
+# HYBRID (LEXICAL + VECTOR) SEARCH
+# =============================================================================
+
+# Request phrasing the crew wraps around the actual keywords; every
+# template is a "component", so these would match all of them
+LEXICAL_FILLER_WORDS = {
+    'get', 'me', 'make', 'create', 'build', 'generate', 'show', 'find', 'give', 'need', 'want', 'please',
+    'component', 'components', 'section', 'sections', 'template', 'templates', 'block', 'blocks',
+    'page', 'website', 'html', 'css', 'new', 'some', 'any',
+}
+
+
+def build_lexical_query(query_text: str) -> str:
+    """
+    Turn free text into an OR query for ``websearch_to_tsquery`` over its
+    meaningful terms, so that filler words ("Get me ... components") neither
+    veto nor fake a keyword match; documents matching more terms still rank
+    higher. Returns '' when no meaningful term is left.
+    """
+    terms = [term for term in re.findall(r'\w+', query_text) if term.lower() not in LEXICAL_FILLER_WORDS]
+    return ' or '.join(terms)
+
+
+def ann_distance(stage: Optional[str], query_vector: Sequence[float]) -> Tuple[str, Any]:
+    """
+    SQL distance expression (with one placeholder) and its parameter for
+    the column a table's ANN index is built on under ``stage``.
+    """
+    if stage == 'matryoshka':
+        return "embedding_coarse <=> %s::vector", Vector._to_db(list(query_vector[:COARSE_EMBEDDING_DIMENSIONS]))
+    if stage == 'halfvec':
+        return "embedding_half <=> %s::halfvec", HalfVector._to_db(query_vector)
+    if stage == 'binary':
+        return "embedding_binary <~> %s::bit", binary_quantize(query_vector)
+    return "embedding <=> %s::vector", Vector._to_db(query_vector)
+
+
+def _hybrid_ranking_sql(table: str, where: str, stage: Optional[str]) -> str:
+    """
+    SQL for the reciprocal-rank-fusion of the vector and full-text rankings
+    of ``table``, restricted by ``where``. Yields (id, score, lexical_rank).
+    The vector ranking uses the table's ANN column under ``stage``.
+
+    Parameters, in order: query vector, candidate limit, lexical query,
+    candidate limit, RRF k, RRF k.
+    """
+    distance_sql, _ = ann_distance(stage, [])
+    return f"""
+        WITH vector_hits AS (
+            SELECT id, row_number() OVER (ORDER BY distance) AS rank
+            FROM (
+                SELECT id, {distance_sql} AS distance
+                FROM {table}
+                WHERE {where}
+                ORDER BY distance
+                LIMIT %s
+            ) nearest
+        ),
+        lexical_hits AS (
+            SELECT id, row_number() OVER (ORDER BY text_rank DESC) AS rank
+            FROM (
+                SELECT id, ts_rank_cd(search_vector, query) AS text_rank
+                FROM {table}, websearch_to_tsquery('english', %s) query
+                WHERE {where} AND search_vector @@ query
+                ORDER BY text_rank DESC
+                LIMIT %s
+            ) matched
+        )
+        SELECT
+            COALESCE(v.id, l.id) AS id,
+            COALESCE(1.0 / (%s + v.rank), 0) + COALESCE(1.0 / (%s + l.rank), 0) AS score,
+            l.rank AS lexical_rank
+        FROM vector_hits v
+        FULL OUTER JOIN lexical_hits l ON v.id = l.id
+    """
+
+
+def _hybrid_params(query_vector: List[float], query_text: str, stage: Optional[str]) -> list:
+    candidates = get_search_setting('HYBRID_CANDIDATES', 50)
+    rrf_k = get_search_setting('RRF_K', 60)
+    return [
+        ann_distance(stage, query_vector)[1], candidates,
+        build_lexical_query(query_text), candidates,
+        rrf_k, rrf_k,
+    ]
+
+
+def hybrid_search_templates(
+    query_text: str,
+    query_vector: List[float],
+    k: int = 1,
+    threshold: Optional[float] = None,
+    category: Optional[str] = None,
+    fallback_to_global: bool = True
+) -> List[PortfolioTemplate]:
+    """
+    Rank active templates by reciprocal-rank fusion of cosine distance and
+    full-text rank over display name and description, in one statement.
+
+    Keyword matches only reorder the results: a template is accepted only if
+    its similarity clears ``threshold``, as in ``search_templates``, so a
+    missing category is still reported as missing. Returns templates
+    annotated with ``distance``, ``similarity`` and ``score``, best first.
+    """
+    category = normalize_category(category)
+
+    with vector_search_session(get_search_setting('HYBRID_CANDIDATES', 50)):
+        results = []
+        if category:
+            results = _hybrid_templates_query(query_text, query_vector, k, threshold, category)
+            if not results and fallback_to_global:
+                logger.info(f"No '{category}' templates matched, falling back to global search")
+        if not results and (not category or fallback_to_global):
+            results = _hybrid_templates_query(query_text, query_vector, k, threshold, None)
+
+    return results
+
+
+def _hybrid_templates_query(
+    query_text: str,
+    query_vector: List[float],
+    k: int,
+    threshold: Optional[float],
+    category: Optional[str]
+) -> List[PortfolioTemplate]:
+    quote = connection.ops.quote_name
+    table = quote(PortfolioTemplate._meta.db_table)
+    columns = ', '.join(f"t.{quote(field)}" for field in TEMPLATE_ROW_FIELDS)
+
+    where = "is_active"
+    where_params = []
+    if category:
+        where += " AND UPPER(category) = UPPER(%s)"
+        where_params = [category]
+
+    ranking = _hybrid_ranking_sql(table, where, TEMPLATE_COARSE_STAGE)
+    max_distance = 1 - threshold if threshold is not None else 2.0
+    sql = f"""
+        SELECT {columns}, t.embedding <=> %s::vector AS distance, fused.score
+        FROM ({ranking}) fused
+        JOIN {table} t ON t.id = fused.id
+        WHERE (t.embedding <=> %s::vector) <= %s
+        ORDER BY fused.score DESC
+        LIMIT %s
+    """
+    vector = Vector._to_db(query_vector)
+    hybrid = _hybrid_params(query_vector, query_text, TEMPLATE_COARSE_STAGE)
+    # The WHERE fragment appears in both CTEs, after each CTE's first parameter
+    params = (
+        [vector]
+        + hybrid[:1] + where_params + hybrid[1:3] + where_params + hybrid[3:]
+        + [vector, max_distance, k]
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    results = []
+    for row in rows:
+        template = PortfolioTemplate.from_db(connection.alias, list(TEMPLATE_ROW_FIELDS), row[:-2])
+        template.distance = row[-2]
+        template.similarity = 1 - template.distance
+        template.score = float(row[-1])
+        results.append(template)
+
+    return results
+
+
+def hybrid_search_chunks(
+    query_text: str,
+    query_vector: List[float],
+    limit: int = 10,
+    threshold: Optional[float] = None,
+    **filters
+) -> List[Chunk]:
+    """
+    Rank active chunks by reciprocal-rank fusion of cosine distance and
+    full-text rank over ``text_content``, restricted by the ``filter_chunks``
+    filters.
+
+    The fused ranking is computed in one statement; the winning chunks and
+    their section/page/project are then loaded with a single joined query.
+    As for templates, ``threshold`` decides which chunks are accepted.
+    Returns chunks annotated with ``distance``, ``similarity`` and
+    ``score``, best first.
+    """
+    quote = connection.ops.quote_name
+    table = quote(Chunk._meta.db_table)
+
+    where = "is_active AND embedding IS NOT NULL"
+    where_params = []
+    filters = {key: value for key, value in filters.items() if value}
+    if filters:
+        subquery, where_params = filter_chunks(**filters).order_by().values('pk').query.sql_with_params()
+        where += f" AND id IN ({subquery})"
+        where_params = list(where_params)
+
+    max_distance = 1 - threshold if threshold is not None else 2.0
+    sql = f"""
+        SELECT fused.id, fused.score, c.embedding <=> %s::vector AS distance
+        FROM ({_hybrid_ranking_sql(table, where, CHUNK_COARSE_STAGE)}) fused
+        JOIN {table} c ON c.id = fused.id
+        WHERE (c.embedding <=> %s::vector) <= %s
+        ORDER BY fused.score DESC
+        LIMIT %s
+    """
+    vector = Vector._to_db(query_vector)
+    hybrid = _hybrid_params(query_vector, query_text, CHUNK_COARSE_STAGE)
+    params = (
+        [vector]
+        + hybrid[:1] + where_params + hybrid[1:3] + where_params + hybrid[3:]
+        + [vector, max_distance, limit]
+    )
+
+    with vector_search_session(get_search_setting('HYBRID_CANDIDATES', 50)):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            ranked = cursor.fetchall()
+
+    chunks = Chunk.objects.select_related('section__page__project').in_bulk([row[0] for row in ranked])
+    results = []
+    for chunk_pk, score, distance in ranked:
+        chunk = chunks[chunk_pk]
+        chunk.score = float(score)
+        chunk.distance = distance
+        chunk.similarity = 1 - distance
+        results.append(chunk)
+
+    return results
+
+
+# =============================================================================
+# CHUNK AND DOCUMENT SEARCH
+# =============================================================================
+
+# Vector columns and HTML bodies not needed to describe a chunk search hit
+CHUNK_DEFERRED_FIELDS = (
+    'embedding', 'embedding_coarse', 'embedding_half', 'embedding_binary', 'search_vector', 'html_content',
+    'section__html_content', 'section__page__html_content'
+)
+
+
+def filter_chunks(
+    category: Optional[str] = None,
+    project_id: Optional[str] = None,
+    page_type: Optional[str] = None,
+    section_type: Optional[str] = None
+):
+    """Active, embedded chunks restricted to a project category, project, page type or section type."""
+    filtered = Chunk.objects.filter(is_active=True, embedding__isnull=False)
+    if category:
+        filtered = filtered.filter(section__page__project__project_name__iexact=category)
+    if project_id:
+        filtered = filtered.filter(section__page__project__project_id=project_id)
+    if page_type:
+        filtered = filtered.filter(section__page__page_type=page_type)
+    if section_type:
+        filtered = filtered.filter(section__section_type=section_type)
+    return filtered
+
+
+def search_chunks(
+    query_vector: List[float],
+    limit: int = 10,
+    threshold: Optional[float] = None,
+    category: Optional[str] = None,
+    project_id: Optional[str] = None,
+    page_type: Optional[str] = None,
+    section_type: Optional[str] = None
+) -> List[Chunk]:
+    """
+    Return up to ``limit`` active chunks closest to ``query_vector``.
+
+    Section, page and project are fetched in the same query, so reading
+    their names costs no extra queries. Their HTML bodies and the chunk
+    embedding are deferred.
+
+    With ``CHUNK_COARSE_STAGE`` set ('matryoshka', 'halfvec' or 'binary')
+    candidates are first taken from the compact index on the truncated or
+    quantized shadow column, over-sampled by ``RERANK_OVERSAMPLE``, and
+    then re-ranked by full-precision distance (see ``rerank_candidates``).
+
+    Args:
+        query_vector: Query embedding
+        limit: Maximum number of chunks (pushed down as LIMIT)
+        threshold: Minimum cosine similarity, applied in the WHERE clause
+        category: Project name, e.g. the Portfolio category (Hero, About, ...)
+        project_id: Restrict to one project
+        page_type: Restrict to one page type
+        section_type: Restrict to one section type
+
+    Returns:
+        Chunks annotated with ``distance`` and ``similarity``, best first
+    """
+    filtered = filter_chunks(category, project_id, page_type, section_type)
+
+    if CHUNK_COARSE_STAGE:
+        candidates = limit * get_search_setting('RERANK_OVERSAMPLE', 4)
+        with vector_search_session(candidates):
+            ranked = rerank_candidates(filtered, CHUNK_COARSE_STAGE, query_vector, candidates, limit, threshold)
+        results = load_ranked(
+            Chunk.objects.select_related('section__page__project').defer(*CHUNK_DEFERRED_FIELDS), ranked
+        )
+    else:
+        queryset = (
+            filtered
+            .select_related('section__page__project')
+            .defer(*CHUNK_DEFERRED_FIELDS)
+            .annotate(distance=CosineDistance('embedding', query_vector))
+        )
+        if threshold is not None:
+            queryset = queryset.filter(distance__lte=1 - threshold)
+        with vector_search_session(limit):
+            results = list(queryset.order_by('distance')[:limit])
+
+    for chunk in results:
+        chunk.similarity = 1 - chunk.distance
+
+    return results
+
+
+class VectorSearchManager:
+    """Semantic search over the indexed HTML documents."""
+
+    # Chunks fetched per requested document, so that several chunks of the
+    # same page do not crowd other documents out of the results
+    CHUNKS_PER_DOCUMENT = 4
+
+    @staticmethod
+    def format_chunk(chunk: Chunk) -> Dict[str, Any]:
+        """Describe a chunk and the document it belongs to."""
+        section = chunk.section
+        page = section.page
+        project = page.project
+
+        if project.project_id.startswith(HTMLVectorProcessor.PROJECT_ID_PREFIX):
+            file_path = os.path.join(project.html_file_path, page.page_id)
+        else:
+            file_path = project.html_file_path
+
+        return {
+            'title': page.page_name,
+            'category': project.project_name,
+            'template_name': Path(file_path).stem,
+            'file_path': file_path,
+            'project_name': project.project_name,
+            'page_name': page.page_name,
+            'page_type': page.page_type,
+            'section_name': section.section_name,
+            'section_type': section.section_type,
+            'chunk_id': chunk.chunk_id,
+            'chunk_name': chunk.chunk_name,
+            'text_content': chunk.text_content,
+            'similarity': float(chunk.similarity),
+            'distance': float(chunk.distance),
+        }
+
+    @classmethod
+    def search_chunks(cls, query: str, limit: int = 10, similarity_threshold: Optional[float] = None, **filters) -> List[Dict[str, Any]]:
+        """
+        Return the chunks most similar to ``query`` with their document
+        details, ranked by vector distance or, with ``CHUNK_SEARCH_BACKEND``
+        set to 'hybrid', by ``hybrid_search_chunks``.
+        """
+        from .embeddings import embed_query
+
+        if similarity_threshold is None:
+            similarity_threshold = get_search_setting('DEFAULT_SIMILARITY_THRESHOLD', 0.7)
+
+        query_vector = embed_query(query)
+        if get_search_setting('CHUNK_SEARCH_BACKEND', 'vector') == 'hybrid':
+            chunks = hybrid_search_chunks(query, query_vector, limit=limit, threshold=similarity_threshold, **filters)
+        else:
+            chunks = search_chunks(query_vector, limit=limit, threshold=similarity_threshold, **filters)
+        return [cls.format_chunk(chunk) for chunk in chunks]
+
+    @classmethod
+    def search_similar_documents(
+        cls,
+        query: str,
+        category: Optional[str] = None,
+        limit: int = 10,
+        similarity_threshold: Optional[float] = None,
+        page_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the documents (pages) most similar to ``query``, each
+        represented by its best-matching chunk.
+        """
+        results = cls.search_chunks(
+            query,
+            limit=limit * cls.CHUNKS_PER_DOCUMENT,
+            similarity_threshold=similarity_threshold,
+            category=category,
+            page_type=page_type
+        )
+
+        documents = {}
+        for result in results:
+            # Results are best first, so the first chunk seen per page wins
+            documents.setdefault(result['file_path'], result)
+
+        return list(documents.values())[:limit]
+
+
+def get_vector_stats() -> Dict[str, Any]:
+    """Counts of indexed documents, sections and chunks."""
+    pages = Page.objects.filter(is_active=True)
+    chunks = Chunk.objects.filter(is_active=True)
+
+    by_category = dict(
+        pages.filter(project__project_id__startswith=HTMLVectorProcessor.PROJECT_ID_PREFIX)
+        .values_list('project__project_name')
+        .annotate(count=Count('id'))
+        .order_by('project__project_name')
+    )
+    avg_dimension = chunks.aggregate(
+        avg=Avg(Func('embedding', function='vector_dims', output_field=IntegerField()))
+    )['avg']
+
+    return {
+        'total_documents': pages.count(),
+        'total_sections': Section.objects.filter(is_active=True).count(),
+        'total_chunks': chunks.count(),
+        'pending_chunks': chunks.filter(embedding_status__in=['pending', 'processing']).count(),
+        'avg_embedding_dimension': round(avg_dimension or 0),
+        'by_category': by_category,
+    }
+
+
+def setup_pgvector_extension():
+    """
+    Enable the vector extension and create any missing vector indexes.
+
+    Migrations normally do both; this repairs databases whose tables were
+    created without them.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    with connection.schema_editor() as editor:
+        for model in (PortfolioTemplate, Chunk):
+            with connection.cursor() as cursor:
+                existing = connection.introspection.get_constraints(cursor, model._meta.db_table)
+
+            for index in model._meta.indexes:
+                if isinstance(index, (HnswIndex, IvfflatIndex)) and index.name not in existing:
+                    logger.info(f"Creating vector index {index.name}")
+                    editor.add_index(model, index)
+
+
+# =============================================================================
+# PORTFOLIO INDEXING
+# =============================================================================
+
+@dataclass
+class HTMLVectorDocument:
+    """Summary of one indexed HTML file."""
+    category: str
+    title: str
+    template_name: str
+    file_path: str
+    file_size: int
+    sections: int = 0
+    chunks: int = 0
+    reused_embeddings: int = 0
+    computed_embeddings: int = 0
+
+
+class HTMLVectorProcessor:
+    """
+    Index a portfolio directory laid out as ``<Category>/.../<file>.html``.
+
+    Each category becomes a Project and each HTML file a Page identified by
+    its path relative to the portfolio directory; the page's sections and
+    chunks are embedded through ``AIApp.ingest``.
+
+    Every indexed file is recorded in the ``IndexedFile`` manifest (mtime,
+    size, content hash) so ``sync_portfolio_directory`` can re-index only
+    files that changed and remove pages whose files vanished.
+    """
+
+    PROJECT_ID_PREFIX = 'portfolio-'
+    PAGE_TYPES = {
+        'hero': 'home',
+        'about': 'about',
+        'projects': 'portfolio',
+        'contact': 'contact',
+    }
+
+    @staticmethod
+    def get_file_category(html_file: Path, portfolio_path: Path) -> str:
+        relative_path = html_file.relative_to(portfolio_path)
+        return relative_path.parts[0] if len(relative_path.parts) > 1 else "General"
+
+    @staticmethod
+    def get_title(html_content: str, html_file: Path) -> str:
+        match = re.search(r'<title[^>]*>(.*?)</title>', html_content, re.IGNORECASE | re.DOTALL)
+        if match and match.group(1).strip():
+            return match.group(1).strip()
+        return html_file.stem.replace('_', ' ').title()
+
+    @classmethod
+    def find_html_files(cls, portfolio_dir: str, category: Optional[str] = None) -> List[Tuple[Path, str]]:
+        """Return (file, category) pairs, optionally for one category."""
+        portfolio_path = Path(portfolio_dir)
+        files = []
+        for html_file in sorted(portfolio_path.rglob("*.html")):
+            file_category = cls.get_file_category(html_file, portfolio_path)
+            if category and file_category.lower() != category.lower():
+                continue
+            files.append((html_file, file_category))
+        return files
+
+    @classmethod
+    def project_id_for(cls, category: str) -> str:
+        return f"{cls.PROJECT_ID_PREFIX}{category.lower()}"
+
+    @classmethod
+    def process_file(
+        cls,
+        html_file: Path,
+        portfolio_path: Path,
+        category: str,
+        raw_content: Optional[bytes] = None,
+        parsed: Optional[list] = None
+    ) -> HTMLVectorDocument:
+        """
+        Parse, embed and store one HTML file and record it in the manifest.
+
+        ``raw_content`` and ``parsed`` (``html_parsing.parse_html_file``
+        output) skip reading and parsing the file again.
+        """
+        from .ingest import ingest_page
+
+        stat = html_file.stat()
+        if raw_content is None:
+            raw_content = html_file.read_bytes()
+        html_content = raw_content.decode('utf-8')
+        relative_path = html_file.relative_to(portfolio_path).as_posix()
+        title = cls.get_title(html_content, html_file)
+
+        counts = ingest_page(
+            project_data={
+                'project_id': cls.project_id_for(category),
+                'project_name': category,
+                'description': f"{category} templates from {portfolio_path.name}",
+                'html_file_path': str(portfolio_path)
+            },
+            page_data={
+                'page_id': relative_path,
+                'page_name': title,
+                'page_type': cls.PAGE_TYPES.get(category.lower(), 'other'),
+                'html_content': html_content
+            },
+            parsed=parsed
+        )
+
+        IndexedFile.objects.update_or_create(
+            path=relative_path,
+            defaults={
+                'category': category,
+                'mtime': stat.st_mtime,
+                'size': stat.st_size,
+                'content_hash': hashlib.sha256(raw_content).hexdigest()
+            }
+        )
+
+        return HTMLVectorDocument(
+            category=category,
+            title=title,
+            template_name=html_file.stem,
+            file_path=str(html_file),
+            file_size=stat.st_size,
+            sections=counts['sections'],
+            chunks=counts['chunks'],
+            reused_embeddings=counts['reused_embeddings'],
+            computed_embeddings=counts['computed_embeddings']
+        )
+
+    @classmethod
+    def process_files(cls, files: List[Tuple[Path, str]], portfolio_path: Path) -> List[HTMLVectorDocument]:
+        """
+        Index (file, category) pairs.
+
+        Reading, parsing and chunking run in a process pool of
+        ``INGEST_PARSE_WORKERS`` processes (default: one per core), at most
+        two files per worker ahead of this process, which only embeds and
+        writes, in file order.
+        """
+        from .html_parsing import parse_html_file
+        from .ingest import get_chunk_options
+
+        documents = []
+        chunk_options = get_chunk_options()
+        workers = get_search_setting('INGEST_PARSE_WORKERS') or os.cpu_count() or 1
+
+        def index(html_file, category, parse_result):
+            try:
+                documents.append(cls.process_file(html_file, portfolio_path, category, *parse_result()))
+            except Exception as e:
+                logger.error(f"Failed to process {html_file}: {str(e)}")
+
+        if workers <= 1 or len(files) <= 1:
+            for html_file, category in files:
+                index(html_file, category, lambda: parse_html_file(str(html_file), chunk_options))
+            return documents
+
+        # Parsed pages wait in memory until this process writes them, so only
+        # a bounded window of files is submitted ahead of the writer
+        window = workers * 2
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+            for html_file, category in files:
+                if len(pending) >= window:
+                    index(*pending.popleft())
+                future = executor.submit(parse_html_file, str(html_file), chunk_options)
+                pending.append((html_file, category, future.result))
+            while pending:
+                index(*pending.popleft())
+
+        return documents
+
+    @classmethod
+    def process_portfolio_directory(cls, portfolio_dir: str, category: Optional[str] = None) -> List[HTMLVectorDocument]:
+        """Index every HTML file under ``portfolio_dir``."""
+        return cls.process_files(cls.find_html_files(portfolio_dir, category), Path(portfolio_dir))
+
+    @classmethod
+    def sync_portfolio_directory(
+        cls,
+        portfolio_dir: str,
+        category: Optional[str] = None
+    ) -> Tuple[List[HTMLVectorDocument], int, int]:
+        """
+        Incrementally index ``portfolio_dir`` against the manifest.
+
+        Files whose mtime and size match the manifest are skipped without
+        being read; files whose content hash still matches only get their
+        manifest entry refreshed. A changed file is re-indexed in place:
+        ``ingest_page`` replaces its page tree, stale sections and chunks
+        included, in one transaction, so the old page stays searchable until
+        the new one is written. Pages of files that no longer exist are
+        deleted.
+
+        Returns:
+            (documents re-indexed, unchanged file count, removed file count)
+        """
+        portfolio_path = Path(portfolio_dir)
+        manifest = IndexedFile.objects.all()
+        if category:
+            manifest = manifest.filter(category__iexact=category)
+        entries = {entry.path: entry for entry in manifest}
+
+        changed = []
+        unchanged = 0
+        seen = set()
+
+        for html_file, file_category in cls.find_html_files(portfolio_dir, category):
+            relative_path = html_file.relative_to(portfolio_path).as_posix()
+            seen.add(relative_path)
+            entry = entries.get(relative_path)
+
+            try:
+                stat = html_file.stat()
+                if entry:
+                    if entry.mtime == stat.st_mtime and entry.size == stat.st_size:
+                        unchanged += 1
+                        continue
+                    if entry.content_hash == hashlib.sha256(html_file.read_bytes()).hexdigest():
+                        entry.mtime, entry.size = stat.st_mtime, stat.st_size
+                        entry.save(update_fields=['mtime', 'size', 'indexed_at'])
+                        unchanged += 1
+                        continue
+            except OSError as e:
+                logger.error(f"Failed to check {html_file}: {str(e)}")
+                continue
+
+            changed.append((html_file, file_category))
+
+        documents = cls.process_files(changed, portfolio_path)
+
+        removed = [entry for path, entry in entries.items() if path not in seen]
+        for entry in removed:
+            cls.remove_file(entry)
+
+        return documents, unchanged, len(removed)
+
+    @classmethod
+    def remove_file(cls, entry: IndexedFile):
+        """Delete the page indexed from a manifest entry, and the entry."""
+        with transaction.atomic():
+            Page.objects.filter(project__project_id=cls.project_id_for(entry.category), page_id=entry.path).delete()
+            entry.delete()
+        logger.info(f"Removed vanished file {entry.path}")
+
+    @classmethod
+    def clear_documents(cls) -> int:
+        """Delete every indexed portfolio document; returns the page count."""
+        projects = Project.objects.filter(project_id__startswith=cls.PROJECT_ID_PREFIX)
+        count = Page.objects.filter(project__in=projects).count()
+        with transaction.atomic():
+            projects.delete()
+            IndexedFile.objects.all().delete()
+        return count
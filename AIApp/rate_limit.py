@@ -0,0 +1,30 @@
+"""
+Client-side rate limiting for OpenAI calls made by batch jobs.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``rate_per_minute``."""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.tokens = float(rate_per_minute)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, tokens=1):
+        # A single request larger than the bucket only has to wait for a full bucket
+        tokens = min(tokens, self.capacity)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import PortfolioTemplate
+from .template_index import bump_template_index_version
+
+
+@receiver(post_save, sender=PortfolioTemplate)
+@receiver(post_delete, sender=PortfolioTemplate)
+def invalidate_template_index(sender, **kwargs):
+    """Rebuild the in-memory template index on next lookup."""
+    # A rebuild before the commit would pair the new version with the old rows
+    transaction.on_commit(bump_template_index_version)
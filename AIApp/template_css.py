@@ -0,0 +1,159 @@
+"""
+CSS generation for portfolio templates stored without ``css_content``.
+
+``manage.py precompute_template_css`` fills the gaps offline; at request time
+``get_template_css`` only generates CSS for a template that is still
+missing it, behind a Postgres advisory lock so concurrent requests (in any
+process) wait for one generation instead of each starting their own. The
+wait is bounded by ``CSS_LOCK_WAIT``; a caller that times out generates the
+CSS itself rather than holding its request open.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .llm_clients import create_async_openai_client, get_chat_model, model_slot
+from .models import PortfolioTemplate
+from .pg_vector import get_search_setting
+from .rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+CSS_MODEL = "gpt-5"
+
+# First key of the two-key advisory locks taken per template
+CSS_LOCK_NAMESPACE = 24024
+
+# Seconds between checks while another caller holds a template's lock
+CSS_LOCK_POLL_INTERVAL = 0.5
+
+CSS_INSTRUCTIONS = """
+You are an assistant that generates CSS for a given HTML component.
+
+Instructions:
+- Analyze the HTML component and generate the CSS for the component.
+- Your response must contain only the code for the component—no explanations, comments, or extra text.
+- The component should be visually appealing, production-ready, and responsive.
+- The code you provide will be inserted directly into an existing CSS file, so ensure it works standalone.
+- Keep your code clean and well-structured.
+
+HTML:
+{html_content}
+"""
+
+
+def create_css_for_html(html_content: str) -> str:
+    with model_slot(CSS_MODEL):
+        response = get_chat_model(CSS_MODEL).invoke(CSS_INSTRUCTIONS.format(html_content=html_content))
+    return response.content
+
+
+async def acreate_css_for_html(client, html_content: str) -> str:
+    # ``client`` belongs to the running loop; precompute_missing_css's own
+    # semaphore and rate limit bound the calls
+    response = await client.responses.create(
+        model=CSS_MODEL,
+        input=CSS_INSTRUCTIONS.format(html_content=html_content)
+    )
+    return response.output_text
+
+
+def templates_missing_css():
+    return PortfolioTemplate.objects.filter(is_active=True).filter(Q(css_content__isnull=True) | Q(css_content=''))
+
+
+def save_template_css(pk: int, css: str) -> bool:
+    """Store generated CSS unless the template got CSS in the meantime."""
+    updated = (
+        PortfolioTemplate.objects
+        .filter(Q(css_content__isnull=True) | Q(css_content=''), pk=pk)
+        .update(css_content=css, updated_at=timezone.now())
+    )
+    return bool(updated)
+
+
+def get_template_css(name: str, html_content: str) -> str:
+    """
+    Return the template's CSS, generating and storing it if it is missing.
+
+    Only one caller generates CSS for a given template at a time; the others
+    poll the same advisory lock and return the stored result as soon as it
+    is saved. A caller still waiting after ``CSS_LOCK_WAIT`` seconds
+    generates the CSS itself.
+    """
+    template = PortfolioTemplate.objects.filter(name=name).only('pk', 'css_content').first()
+    if template is None:
+        return create_css_for_html(html_content)
+    if template.css_content:
+        return template.css_content
+
+    deadline = time.monotonic() + get_search_setting('CSS_LOCK_WAIT', 60.0)
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [CSS_LOCK_NAMESPACE, template.pk])
+            locked = cursor.fetchone()[0]
+            # Re-checked after every attempt: the lock holder may have saved it
+            css = PortfolioTemplate.objects.filter(pk=template.pk).values_list('css_content', flat=True).first()
+            if css or locked or time.monotonic() >= deadline:
+                break
+            time.sleep(CSS_LOCK_POLL_INTERVAL)
+
+        try:
+            if css:
+                return css
+            if not locked:
+                logger.warning(f"Timed out waiting for CSS of {name}; generating it without the lock")
+
+            css = create_css_for_html(html_content)
+            save_template_css(template.pk, css)
+            print(f"💾 CSS saved to DB for component: {name}")
+            return css
+        finally:
+            if locked:
+                cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [CSS_LOCK_NAMESPACE, template.pk])
+
+
+async def precompute_missing_css(
+    templates: List[Dict],
+    concurrency: int = 4,
+    requests_per_minute: int = 60
+) -> Dict[str, int]:
+    """
+    Generate CSS for ``templates`` (dicts with pk, name and content)
+    concurrently, with at most ``concurrency`` requests in flight and
+    ``requests_per_minute`` started per minute. Each result is saved as soon
+    as it arrives.
+    """
+    client = create_async_openai_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(requests_per_minute)
+    counts = {'generated': 0, 'skipped': 0, 'failed': 0}
+
+    async def generate(template):
+        await bucket.acquire()
+        try:
+            async with semaphore:
+                css = await acreate_css_for_html(client, template['content'])
+        except Exception as e:
+            counts['failed'] += 1
+            logger.error(f"CSS generation failed for {template['name']}: {str(e)}")
+            return
+
+        if await sync_to_async(save_template_css)(template['pk'], css):
+            counts['generated'] += 1
+            logger.info(f"Saved CSS for {template['name']}")
+        else:
+            counts['skipped'] += 1
+
+    try:
+        await asyncio.gather(*(generate(template) for template in templates))
+    finally:
+        await client.close()
+    return counts
@@ -0,0 +1,205 @@
+"""
+In-process similarity index over PortfolioTemplate embeddings.
+
+The template table is small and read-mostly, so each worker keeps the active
+templates as a contiguous, L2-normalised float32 matrix and answers lookups
+with a single dot product instead of a Postgres round-trip. The matrix is
+rebuilt lazily when the index version changes (bumped by the
+``post_save``/``post_delete`` signals in ``AIApp.signals``) or when it is
+older than ``TEMPLATE_INDEX_TTL`` seconds, which bounds staleness for
+changes made by other processes when no shared cache is configured.
+"""
+
+import logging
+import threading
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import PortfolioTemplate
+from .pg_vector import (
+    TEMPLATE_ROW_FIELDS, get_search_setting, hybrid_search_templates, normalize_category,
+    search_templates, search_templates_batch
+)
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'aiapp:template_index_version'
+
+# Bumped in-process by the signal handlers; the cache key covers other workers
+_local_version = 0
+
+
+def bump_template_index_version():
+    """Mark every worker's template index as stale."""
+    global _local_version
+    _local_version += 1
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.add(VERSION_CACHE_KEY, 1, timeout=None)
+
+
+def get_template_index_version():
+    return (_local_version, cache.get(VERSION_CACHE_KEY, 0))
+
+
+class TemplateIndex:
+    """Dense in-memory index of active template embeddings."""
+
+    FIELDS = TEMPLATE_ROW_FIELDS
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._built_at = 0.0
+        # (matrix, lower-cased categories, light field rows), replaced as a whole
+        self._data = (np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=object), [])
+
+    def is_stale(self) -> bool:
+        if self._version != get_template_index_version():
+            return True
+        ttl = get_search_setting('TEMPLATE_INDEX_TTL', 300)
+        return bool(ttl) and time.monotonic() - self._built_at > ttl
+
+    def build(self):
+        """Load active templates and rebuild the matrix."""
+        version = get_template_index_version()
+        queryset = PortfolioTemplate.objects.filter(is_active=True).exclude(embedding__isnull=True)
+        records = list(queryset.values_list('embedding', *self.FIELDS))
+
+        if records:
+            matrix = np.ascontiguousarray(
+                np.vstack([record[0] for record in records]), dtype=np.float32
+            )
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+        else:
+            matrix = np.empty((0, get_search_setting('EMBEDDING_DIMENSION', 1536)), dtype=np.float32)
+
+        rows = [record[1:] for record in records]
+        category_position = self.FIELDS.index('category')
+        categories = np.array([(row[category_position] or '').lower() for row in rows], dtype=object)
+
+        # Swap in one tuple so concurrent readers always see a consistent index
+        self._data = (matrix, categories, rows)
+        self._version = version
+        self._built_at = time.monotonic()
+        logger.info(f"Built in-memory template index with {len(rows)} templates")
+
+    def ensure_fresh(self):
+        if self.is_stale():
+            with self._lock:
+                if self.is_stale():
+                    self.build()
+
+    def _top_k(self, scores: np.ndarray, candidates: np.ndarray, k: int, threshold: Optional[float]) -> List[int]:
+        """Return row positions of the best ``k`` candidates, best first."""
+        if threshold is not None:
+            candidates = candidates[scores[candidates] >= threshold]
+        if not len(candidates):
+            return []
+        if len(candidates) > k:
+            top = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = candidates[top]
+        return candidates[np.argsort(-scores[candidates])].tolist()
+
+    def _to_template(self, row: tuple, score: float) -> PortfolioTemplate:
+        template = PortfolioTemplate.from_db('default', list(self.FIELDS), row)
+        template.similarity = float(score)
+        template.distance = 1 - template.similarity
+        return template
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int = 1,
+        threshold: Optional[float] = None,
+        category: Optional[str] = None,
+        fallback_to_global: bool = True
+    ) -> List[PortfolioTemplate]:
+        """
+        Same contract as ``pg_vector.search_templates``: returns deferred
+        templates annotated with ``distance`` and ``similarity``, best first.
+        """
+        return self.search_many([query_vector], [category], k, threshold, fallback_to_global)[0]
+
+    def search_many(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        categories: Sequence[Optional[str]],
+        k: int = 1,
+        threshold: Optional[float] = None,
+        fallback_to_global: bool = True
+    ) -> List[List[PortfolioTemplate]]:
+        """Score every query against the index with one matrix product."""
+        self.ensure_fresh()
+        matrix, template_categories, rows = self._data
+        if not len(matrix) or not len(query_vectors):
+            return [[] for _ in query_vectors]
+
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        scores = matrix @ (queries / norms).T
+
+        results = []
+        for column, category in enumerate(categories):
+            column_scores = scores[:, column]
+            category = normalize_category(category)
+            positions = []
+            if category:
+                in_category = np.flatnonzero(template_categories == category.lower())
+                positions = self._top_k(column_scores, in_category, k, threshold)
+                if not positions and fallback_to_global:
+                    logger.info(f"No '{category}' templates matched, falling back to global search")
+            if not positions and (not category or fallback_to_global):
+                positions = self._top_k(column_scores, np.arange(len(column_scores)), k, threshold)
+
+            results.append([self._to_template(rows[position], column_scores[position]) for position in positions])
+
+        return results
+
+
+template_index = TemplateIndex()
+
+
+def find_templates(
+    query_vector: Sequence[float],
+    query_text: Optional[str] = None,
+    **kwargs
+) -> List[PortfolioTemplate]:
+    """
+    Search templates with the backend selected by ``TEMPLATE_SEARCH_BACKEND``:
+    'memory' for this module's index, 'pgvector' for the database HNSW
+    indexes, or 'hybrid' for full-text + vector rank fusion (needs
+    ``query_text``).
+    """
+    backend = get_search_setting('TEMPLATE_SEARCH_BACKEND', 'memory')
+    if backend == 'hybrid' and query_text:
+        return hybrid_search_templates(query_text, query_vector, **kwargs)
+    if backend == 'memory':
+        return template_index.search(query_vector, **kwargs)
+    return search_templates(query_vector, **kwargs)
+
+
+def find_templates_batch(
+    query_vectors: Sequence[Sequence[float]],
+    categories: Sequence[Optional[str]],
+    query_texts: Optional[Sequence[str]] = None,
+    **kwargs
+) -> List[List[PortfolioTemplate]]:
+    """Batched ``find_templates``: one result list per (vector, category) pair."""
+    backend = get_search_setting('TEMPLATE_SEARCH_BACKEND', 'memory')
+    if backend == 'hybrid' and query_texts:
+        # Each fused ranking is already a single statement
+        return [
+            hybrid_search_templates(query_text, query_vector, category=category, **kwargs)
+            for query_text, query_vector, category in zip(query_texts, query_vectors, categories)
+        ]
+    if backend == 'memory':
+        return template_index.search_many(query_vectors, categories, **kwargs)
+    return search_templates_batch(query_vectors, categories, **kwargs)
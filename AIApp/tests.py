@@ -1,3 +1,676 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from .Crew.openai_page_generator import (
+    HTMLBlockStreamExtractor, generate_components, make_website_stream, stream_response_output_text
+)
+from .embeddings import (
+    EmbeddingCache, EmbeddingProvider, content_hash, embed_documents_with_store, embed_queries, embed_query,
+    get_embedding_provider, iter_batches
+)
+from .generation_cache import GenerationCache, lookup_generation, store_generation
+from . import html_parsing
+from .html_parsing import chunk_text, parse_html_sections
+from .ingest import embed_pending_chunks, ingest_page
+from .models import Chunk, IndexedFile, Page, PortfolioTemplate, Section
+from .pg_vector import HTMLVectorProcessor, build_lexical_query, hybrid_search_templates, search_templates_batch
+from .rate_limit import TokenBucket
+from .template_css import get_template_css
+from .template_index import TemplateIndex, get_template_index_version
+
+
+def make_parsed(html_content, section_chunks):
+    """Parsed page with hand-made chunks, so tests need no tokenizer."""
+    parsed = []
+    for section_data in parse_html_sections(html_content):
+        chunks = [
+            {
+                'chunk_id': hashlib.md5(text.encode()).hexdigest()[:8],
+                'chunk_name': f'Chunk {order + 1}',
+                'html_content': text,
+                'text_content': text,
+                'chunk_size': len(text),
+                'order': order
+            }
+            for order, text in enumerate(section_chunks[section_data['section_type']])
+        ]
+        parsed.append((section_data, chunks))
+    return parsed
+
+
+class WhitespaceEncoding:
+    """Stand-in tokenizer: one token per word."""
+
+    def __init__(self, *args):
+        pass
+
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return ' '.join(tokens)
+
+
+def ingest_test_page(html_content, section_chunks):
+    """Ingest ``html_content`` as one page with its chunks queued for embedding."""
+    return ingest_page(
+        {'project_id': 'test-project', 'project_name': 'Test', 'description': '', 'html_file_path': 'result.html'},
+        {'page_id': 'index', 'page_name': 'Index', 'page_type': 'home', 'html_content': html_content},
+        make_parsed(html_content, section_chunks),
+        defer_embeddings=True
+    )
+
+
+class IngestPageTests(TestCase):
+    def test_reingest_removes_stale_sections_and_chunks(self):
+        ingest_test_page(
+            '<section class="hero">Hi there</section><section class="about">About me</section>',
+            {'hero': ['Hi there', 'Welcome'], 'about': ['About me']}
+        )
+        Chunk.objects.update(embedding=[0.1] * 1536, embedding_status='ready')
+
+        ingest_test_page(
+            '<section class="hero">Hi there</section>',
+            {'hero': ['Welcome', 'Hi there', 'Brand new']}
+        )
+
+        self.assertEqual(list(Section.objects.values_list('section_id', flat=True)), ['hero_0'])
+        chunks = {chunk.text_content: chunk for chunk in Chunk.objects.all()}
+        self.assertEqual(set(chunks), {'Welcome', 'Hi there', 'Brand new'})
+        # Kept chunks keep their embedding but move to their new position
+        self.assertEqual(chunks['Welcome'].order, 0)
+        self.assertEqual(chunks['Hi there'].order, 1)
+        self.assertEqual(chunks['Hi there'].embedding_status, 'ready')
+        self.assertEqual(chunks['Brand new'].embedding_status, 'pending')
+
+
+# Parse in the test process, where the tokenizer and embedding patches apply
+@override_settings(VECTOR_SEARCH_SETTINGS={**settings.VECTOR_SEARCH_SETTINGS, 'INGEST_PARSE_WORKERS': 1})
+class SyncPortfolioDirectoryTests(TestCase):
+    def setUp(self):
+        self.portfolio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.portfolio)
+        self.write('Hero/hero.html', '<section class="hero">Welcome to my site.</section>')
+        self.write('Footer/footer.html', '<footer>Contact me.</footer>')
+
+        html_parsing.get_encoding.cache_clear()
+        self.addCleanup(html_parsing.get_encoding.cache_clear)
+        patches = [
+            mock.patch.object(html_parsing, 'get_encoding', return_value=WhitespaceEncoding()),
+            mock.patch('AIApp.embeddings.embed_documents_with_store', side_effect=lambda texts: (
+                [[0.1] * 1536 for _ in texts], {'reused': 0, 'computed': len(texts)}
+            )),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def write(self, relative_path, html_content, mtime=None):
+        path = self.portfolio / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(html_content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def sync(self):
+        documents, unchanged, removed = HTMLVectorProcessor.sync_portfolio_directory(str(self.portfolio))
+        return sorted(document.template_name for document in documents), unchanged, removed
+
+    def page_texts(self, page_id):
+        return set(Chunk.objects.filter(section__page__page_id=page_id).values_list('text_content', flat=True))
+
+    def test_unchanged_changed_and_deleted_files(self):
+        self.assertEqual(self.sync(), (['footer', 'hero'], 0, 0))
+        self.assertEqual(self.sync(), ([], 2, 0))
+
+        # Touched but identical content only refreshes the manifest
+        self.write('Footer/footer.html', '<footer>Contact me.</footer>', mtime=1)
+        self.assertEqual(self.sync(), ([], 2, 0))
+        self.assertEqual(IndexedFile.objects.get(path='Footer/footer.html').mtime, 1)
+
+        self.write('Hero/hero.html', '<section class="hero">Hire me today.</section>', mtime=2)
+        self.assertEqual(self.sync(), (['hero'], 1, 0))
+        self.assertEqual(self.page_texts('Hero/hero.html'), {'Hire me today.'})
+        self.assertEqual(Page.objects.count(), 2)
+
+        (self.portfolio / 'Footer/footer.html').unlink()
+        self.assertEqual(self.sync(), ([], 1, 1))
+        self.assertEqual(list(Page.objects.values_list('page_id', flat=True)), ['Hero/hero.html'])
+        self.assertEqual(list(IndexedFile.objects.values_list('path', flat=True)), ['Hero/hero.html'])
+        self.assertFalse(self.page_texts('Footer/footer.html'))
+
+
+class EmbedPendingChunksTests(TestCase):
+    def setUp(self):
+        ingest_test_page(
+            '<section class="hero">Hero</section>',
+            {'hero': ['one', 'two', 'bad', 'four']}
+        )
+
+    @staticmethod
+    def fake_embed(texts):
+        if 'bad' in texts:
+            raise ValueError("rejected input")
+        return [[0.1] * 1536 for _ in texts], {'reused': 0, 'computed': len(texts)}
+
+    def test_failing_text_does_not_fail_the_batch(self):
+        with mock.patch('AIApp.embeddings.embed_documents_with_store', side_effect=self.fake_embed):
+            counts = embed_pending_chunks(batch_size=10, max_attempts=2)
+
+        self.assertEqual(counts, {'claimed': 4, 'embedded': 3, 'failed': 0})
+        statuses = dict(Chunk.objects.values_list('text_content', 'embedding_status'))
+        self.assertEqual(statuses, {'one': 'ready', 'two': 'ready', 'bad': 'pending', 'four': 'ready'})
+
+        with mock.patch('AIApp.embeddings.embed_documents_with_store', side_effect=self.fake_embed):
+            counts = embed_pending_chunks(batch_size=10, max_attempts=2)
+
+        self.assertEqual(counts, {'claimed': 1, 'embedded': 0, 'failed': 1})
+        self.assertEqual(Chunk.objects.get(text_content='bad').embedding_status, 'failed')
+
+
+class BuildLexicalQueryTests(SimpleTestCase):
+    def test_filler_words_are_dropped(self):
+        self.assertEqual(build_lexical_query("Get me navbar components"), 'navbar')
+        self.assertEqual(build_lexical_query("newsletter footer section"), 'newsletter or footer')
+
+    def test_only_filler_words_match_nothing(self):
+        self.assertEqual(build_lexical_query("Get me some components"), '')
+
+
+class HTMLBlockStreamExtractorTests(SimpleTestCase):
+    def stream(self, text, size):
+        extractor = HTMLBlockStreamExtractor()
+        fragments = [extractor.feed(text[i:i + size]) for i in range(0, len(text), size)]
+        fragments.append(extractor.finish())
+        return extractor, ''.join(fragments)
+
+    def test_streamed_html_does_not_depend_on_delta_size(self):
+        cases = [
+            ("Here you go:\n```html\n<div>`code` and ``more``</div>\n```\nEnjoy!", "<div>`code` and ``more``</div>"),
+            ("```HTML\n  <p>Hi</p>  \n```", "<p>Hi</p>"),
+            # Unterminated block: everything after the opening fence
+            ("```html\n<section>cut off</section>\n", "<section>cut off</section>"),
+            # No ```html block: the extract_html_from_text fallbacks
+            ("```css\n.a { color: red; }\n```", "css\n.a { color: red; }"),
+            ("<div>no fence</div>", "<div>no fence</div>"),
+        ]
+        for text, expected in cases:
+            for size in (1, 2, 3, 7, len(text)):
+                with self.subTest(text=text, size=size):
+                    extractor, streamed = self.stream(text, size)
+                    self.assertEqual(streamed, expected)
+                    self.assertEqual(extractor.html, expected)
+
+    def test_fragments_are_emitted_before_the_block_closes(self):
+        extractor = HTMLBlockStreamExtractor()
+        self.assertEqual(extractor.feed("Sure ```html\n<div>"), '<div>')
+        self.assertEqual(extractor.feed("Hi</div>\n``"), 'Hi</div>')
+        self.assertEqual(extractor.feed("`\nThanks"), '')
+        self.assertEqual(extractor.finish(), '')
+        self.assertEqual(extractor.html, '<div>Hi</div>')
+
+
+class StreamResponseOutputTextTests(SimpleTestCase):
+    def test_yields_text_deltas_and_reraises_errors(self):
+        events = [
+            mock.Mock(type='response.created'),
+            mock.Mock(type='response.output_text.delta', delta='<div>'),
+            mock.Mock(type='response.output_text.delta', delta='</div>'),
+            mock.Mock(type='response.completed'),
+        ]
+        client = mock.MagicMock()
+        client.responses.create.return_value.__iter__.return_value = iter(events)
+        with mock.patch('AIApp.Crew.openai_page_generator.get_openai_client', return_value=client):
+            self.assertEqual(list(stream_response_output_text('prompt')), ['<div>', '</div>'])
+
+        client.responses.create.side_effect = RuntimeError("connection reset")
+        with mock.patch('AIApp.Crew.openai_page_generator.get_openai_client', return_value=client):
+            with self.assertRaisesMessage(RuntimeError, "connection reset"):
+                list(stream_response_output_text('prompt'))
+
+    def test_raises_unless_the_response_completed(self):
+        delta = mock.Mock(type='response.output_text.delta', delta='<div>')
+        incomplete = mock.Mock(type='response.incomplete')
+        incomplete.response.incomplete_details = 'max_output_tokens'
+        failed = mock.Mock(type='response.failed')
+        failed.response.error = 'server_error'
+
+        for events, message in [
+            ([delta, incomplete], 'Response incomplete: max_output_tokens'),
+            ([delta, failed], 'Response failed: server_error'),
+            ([delta], 'Response stream ended without a terminal event'),
+        ]:
+            with self.subTest(message=message):
+                client = mock.MagicMock()
+                client.responses.create.return_value.__iter__.return_value = iter(events)
+                with mock.patch('AIApp.Crew.openai_page_generator.get_openai_client', return_value=client):
+                    stream = stream_response_output_text('prompt')
+                    self.assertEqual(next(stream), '<div>')
+                    with self.assertRaisesMessage(RuntimeError, message):
+                        next(stream)
+
+    def test_partial_stream_is_neither_cached_nor_saved(self):
+        def failing_stream(website_input):
+            yield '```html\n<div>'
+            raise RuntimeError("Response incomplete: max_output_tokens")
+
+        with mock.patch('AIApp.Crew.openai_page_generator.stream_response_output_text', side_effect=failing_stream), \
+                mock.patch('AIApp.Crew.openai_page_generator.lookup_generation', return_value=(None, None)), \
+                mock.patch('AIApp.Crew.openai_page_generator.store_generation') as store_generation, \
+                mock.patch('AIApp.Crew.openai_page_generator.save_html') as save_html:
+            with self.assertRaises(RuntimeError):
+                list(make_website_stream(website_input='prompt'))
+
+        store_generation.assert_not_called()
+        save_html.assert_not_called()
+
+
+class GenerateComponentsTests(SimpleTestCase):
+    def test_generates_concurrently_and_keeps_input_order(self):
+        specs = [
+            {'name': 'hero', 'description': 'a bakery', 'category': 'Hero'},
+            {'name': 'menu', 'description': 'a bakery', 'category': 'Menu'},
+            {'name': 'footer', 'description': 'a bakery', 'category': 'Footer'},
+        ]
+        # Every generation waits for the others, so a sequential run breaks the barrier
+        barrier = threading.Barrier(len(specs), timeout=5)
+        delays = {'hero.html': 0.2, 'menu.html': 0.1, 'footer.html': 0.0}
+
+        def make_website(*, website_input, filename, use_cache, category):
+            barrier.wait()
+            time.sleep(delays[filename])
+            if filename == 'menu.html':
+                raise RuntimeError("menu failed")
+            return Path(filename)
+
+        with mock.patch('AIApp.Crew.openai_page_generator.make_website', side_effect=make_website) as patched, \
+                mock.patch('AIApp.Crew.openai_page_generator.GENERATION_CONCURRENCY', len(specs)):
+            results = generate_components(specs)
+
+        self.assertEqual(results[0], Path('hero.html'))
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertEqual(results[2], Path('footer.html'))
+        self.assertEqual(
+            sorted(call.kwargs['category'] for call in patched.call_args_list), ['Footer', 'Hero', 'Menu']
+        )
+
+
+class ChunkTextTests(SimpleTestCase):
+    def setUp(self):
+        html_parsing.get_encoding.cache_clear()
+        self.addCleanup(html_parsing.get_encoding.cache_clear)
+
+    def chunk(self, text, **options):
+        with mock.patch.object(html_parsing, 'get_encoding', return_value=WhitespaceEncoding()):
+            return [chunk['text_content'] for chunk in chunk_text(text, **options)]
+
+    def test_chunks_stay_within_the_limit_and_overlap_by_whole_sentences(self):
+        text = ' '.join(f"Sentence {i} has five words." for i in range(12))
+        chunks = self.chunk(text, chunk_tokens=12, overlap_tokens=5)
+
+        self.assertEqual(chunks[0], "Sentence 0 has five words. Sentence 1 has five words.")
+        self.assertEqual(chunks[1], "Sentence 1 has five words. Sentence 2 has five words.")
+        for previous, chunk in zip(chunks, chunks[1:]):
+            self.assertLessEqual(len(chunk.split()), 12)
+            # The next chunk starts with the last sentence of the previous one
+            self.assertTrue(chunk.startswith(previous.split('. ')[-1].rstrip('.')))
+        self.assertTrue(chunks[-1].endswith("Sentence 11 has five words."))
+
+    def test_long_sentence_is_split_into_overlapping_windows(self):
+        text = ' '.join(str(i) for i in range(10))
+        self.assertEqual(
+            self.chunk(text, chunk_tokens=4, overlap_tokens=1),
+            ['0 1 2 3', '3 4 5 6', '6 7 8 9']
+        )
+
+    def test_max_tokens_caps_the_chunk_size(self):
+        text = "One two three. Four five six."
+        self.assertEqual(self.chunk(text, chunk_tokens=100, overlap_tokens=0, max_tokens=3), ["One two three.", "Four five six."])
+
+    def test_short_text_is_one_full_content_chunk(self):
+        with mock.patch.object(html_parsing, 'get_encoding', return_value=WhitespaceEncoding()):
+            chunks = chunk_text("Just a few words.", chunk_tokens=10)
+        self.assertEqual([(chunk['chunk_name'], chunk['text_content']) for chunk in chunks], [('Full Content', "Just a few words.")])
+
+    def test_local_tokenizer_sizes_the_chunks(self):
+        text = "One two three four. Five six seven eight. Nine ten eleven twelve."
+        with mock.patch.object(html_parsing, 'TokenizerEncoding', WhitespaceEncoding):
+            chunks = chunk_text(text, chunk_tokens=8, overlap_tokens=0, tokenizer_path='tokenizer.json')
+
+        self.assertEqual(
+            [chunk['text_content'] for chunk in chunks],
+            ["One two three four. Five six seven eight.", "Nine ten eleven twelve."]
+        )
+
+
+class IterBatchesTests(SimpleTestCase):
+    def test_batches_respect_both_limits(self):
+        texts = ['a' * 3, 'b' * 3, 'c' * 3, 'd' * 8, 'e', 'f']
+        self.assertEqual(
+            list(iter_batches(texts, batch_size=2, max_chars=7)),
+            [['aaa', 'bbb'], ['ccc'], ['dddddddd'], ['e', 'f']]
+        )
+
+    def test_no_texts_no_batches(self):
+        self.assertEqual(list(iter_batches([], batch_size=2, max_chars=10)), [])
+
+
+class StubEmbeddingProvider(EmbeddingProvider):
+    """Two-dimensional local provider that records every batch it embeds."""
+
+    model_name = 'stub'
+
+    def __init__(self, dimensions=1536):
+        super().__init__(dimensions)
+        self.batches = []
+
+    def _embed(self, texts):
+        self.batches.append(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def search_settings(**overrides):
+    return override_settings(VECTOR_SEARCH_SETTINGS={**settings.VECTOR_SEARCH_SETTINGS, **overrides})
+
+
+class EmbeddingProviderTests(SimpleTestCase):
+    def setUp(self):
+        get_embedding_provider.cache_clear()
+        self.addCleanup(get_embedding_provider.cache_clear)
+
+    def test_provider_follows_the_setting(self):
+        with search_settings(EMBEDDING_PROVIDER='onnx'), \
+                mock.patch('AIApp.embeddings.OnnxEmbeddingProvider') as onnx_provider:
+            self.assertIs(get_embedding_provider(), onnx_provider.return_value)
+        self.assertEqual(onnx_provider.call_args.kwargs['dimensions'], 1536)
+
+        get_embedding_provider.cache_clear()
+        with search_settings(EMBEDDING_PROVIDER='openai'), \
+                mock.patch('AIApp.embeddings.OpenAIEmbeddingProvider') as openai_provider:
+            self.assertIs(get_embedding_provider(), openai_provider.return_value)
+        openai_provider.assert_called_once_with('text-embedding-3-small', 1536)
+
+        get_embedding_provider.cache_clear()
+        with search_settings(EMBEDDING_PROVIDER='word2vec'):
+            with self.assertRaisesMessage(ValueError, 'word2vec'):
+                get_embedding_provider()
+
+    def test_local_vectors_are_zero_padded_to_the_stored_dimension(self):
+        provider = StubEmbeddingProvider()
+        vectors = provider.embed_documents(['abc', 'de'])
+
+        self.assertEqual([len(vector) for vector in vectors], [1536, 1536])
+        self.assertEqual(vectors[0][:2], [3.0, 1.0])
+        self.assertFalse(any(vectors[0][2:]))
+        self.assertEqual(provider.embed_query('abc'), vectors[0])
+        with self.assertRaises(ValueError):
+            StubEmbeddingProvider(dimensions=1).embed_documents(['abc'])
+
+    def test_unchanged_content_reuses_the_stored_embedding(self):
+        provider = StubEmbeddingProvider()
+        stored_vector = unit_vector(1.0)
+        with mock.patch('AIApp.embeddings.get_embedding_provider', return_value=provider), \
+                mock.patch('AIApp.models.StoredEmbedding.objects') as objects:
+            objects.filter.return_value.values_list.return_value = [(content_hash('unchanged'), stored_vector)]
+            vectors, counts = embed_documents_with_store(['unchanged', 'edited', 'edited'])
+
+        objects.filter.assert_called_once_with(
+            model='stub', content_hash__in={content_hash('unchanged'), content_hash('edited')}
+        )
+        self.assertEqual(provider.batches, [['edited']])
+        self.assertEqual(vectors[0], stored_vector)
+        self.assertEqual(vectors[1], vectors[2])
+        self.assertEqual(counts, {'reused': 2, 'computed': 1})
+        created = objects.bulk_create.call_args.args[0]
+        self.assertEqual([stored.content_hash for stored in created], [content_hash('edited')])
+
+
+class QueryEmbeddingCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.provider = StubEmbeddingProvider()
+        for patch in [
+            mock.patch('AIApp.embeddings.get_embedding_provider', return_value=self.provider),
+            mock.patch('AIApp.embeddings.query_embedding_cache', EmbeddingCache(max_entries=8)),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_case_and_whitespace_variants_hit_the_cache(self):
+        vector = embed_query("Get me footer components")
+        self.assertEqual(embed_query("  get ME   Footer components "), vector)
+        self.assertEqual(self.provider.batches, [["Get me footer components"]])
+
+    def test_different_text_misses(self):
+        embed_query("Get me footer components")
+        embed_query("Get me hero components")
+        self.assertEqual(self.provider.batches, [["Get me footer components"], ["Get me hero components"]])
+
+    def test_batched_queries_only_embed_the_misses(self):
+        embed_query("footer")
+        vectors = embed_queries(["FOOTER", "hero", "pricing"])
+        self.assertEqual(self.provider.batches, [["footer"], ["hero", "pricing"]])
+        self.assertEqual(vectors[0], embed_query("footer"))
+
+
+class TemplateIndexTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.vectors = rng.normal(size=(50, 16)).astype(np.float32)
+        self.categories = np.array(['hero', 'footer'] * 25, dtype=object)
+
+        fields = TemplateIndex.FIELDS
+        rows = []
+        for position, category in enumerate(self.categories):
+            row = [None] * len(fields)
+            row[fields.index('id')] = position
+            row[fields.index('category')] = category.title()
+            rows.append(tuple(row))
+
+        self.index = TemplateIndex()
+        matrix = self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        self.index._data = (matrix, self.categories, rows)
+        self.queries = rng.normal(size=(5, 16)).astype(np.float32)
+
+    def brute_force(self, query, k, threshold=None, category=None):
+        scores = [
+            (float(np.dot(vector, query) / (np.linalg.norm(vector) * np.linalg.norm(query))), position)
+            for position, vector in enumerate(self.vectors)
+            if category is None or self.categories[position] == category
+        ]
+        ranked = sorted(scores, reverse=True)
+        return [position for score, position in ranked if threshold is None or score >= threshold][:k]
+
+    def test_top_k_matches_brute_force(self):
+        with mock.patch.object(TemplateIndex, 'ensure_fresh'):
+            for k, threshold, category in [(1, None, None), (5, None, None), (5, None, 'Footer'), (10, 0.2, 'Hero'), (50, 0.0, None)]:
+                with self.subTest(k=k, threshold=threshold, category=category):
+                    results = self.index.search_many(self.queries, [category] * len(self.queries), k, threshold)
+                    for query, templates in zip(self.queries, results):
+                        expected = self.brute_force(query, k, threshold, category and category.lower())
+                        self.assertEqual([template.pk for template in templates], expected)
+                        for template in templates:
+                            self.assertAlmostEqual(template.distance, 1 - template.similarity)
+
+
+class TemplateIndexInvalidationTests(TestCase):
+    def test_version_is_bumped_only_on_commit(self):
+        version = get_template_index_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            PortfolioTemplate.objects.create(
+                name='hero', category='Hero', display_name='Hero', description='Hero',
+                file_path_template='hero.html', content='<div></div>', embedding=unit_vector(1.0)
+            )
+            self.assertEqual(get_template_index_version(), version)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(get_template_index_version(), version)
+
+
+class GenerationCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = GenerationCache(max_entries=2, ttl=60, threshold=0.9)
+        self.scope = GenerationCache.make_scope('gpt-5', 'instructions')
+
+    def test_exact_hit_ignores_case_and_whitespace(self):
+        self.cache.set(self.scope, "Make a  Footer", 'footer html')
+        self.assertEqual(self.cache.get_exact(self.scope, "make a footer"), 'footer html')
+        self.assertIsNone(self.cache.get_exact(self.scope, "make a header"))
+        self.assertIsNone(self.cache.get_exact(GenerationCache.make_scope('gpt-5', 'other'), "make a footer"))
+
+    def test_near_hit_needs_the_threshold(self):
+        self.cache.set(self.scope, "Make a footer", 'footer html', vector=[1.0, 0.0])
+        self.assertEqual(self.cache.get_near(self.scope, [0.95, 0.05]), 'footer html')
+        self.assertIsNone(self.cache.get_near(self.scope, [0.5, 0.5]))
+
+    def test_entries_expire_after_the_ttl(self):
+        with mock.patch('AIApp.generation_cache.time.time', return_value=1000.0):
+            self.cache.set(self.scope, "Make a footer", 'footer html', vector=[1.0, 0.0])
+        with mock.patch('AIApp.generation_cache.time.time', return_value=1059.0):
+            self.assertEqual(self.cache.get_exact(self.scope, "Make a footer"), 'footer html')
+        with mock.patch('AIApp.generation_cache.time.time', return_value=1061.0):
+            self.assertIsNone(self.cache.get_near(self.scope, [1.0, 0.0]))
+            self.assertIsNone(self.cache.get_exact(self.scope, "Make a footer"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set(self.scope, "one", '1')
+        self.cache.set(self.scope, "two", '2')
+        self.cache.get_exact(self.scope, "one")
+        self.cache.set(self.scope, "three", '3')
+        self.assertEqual(self.cache.get_exact(self.scope, "one"), '1')
+        self.assertIsNone(self.cache.get_exact(self.scope, "two"))
+
+    def test_similar_prompts_for_different_components_do_not_share_output(self):
+        footer_prompt = "Make me Footer component for a bakery"
+        hero_prompt = "Make me Hero component for a bakery"
+        with mock.patch('AIApp.generation_cache.generation_cache', self.cache), \
+                mock.patch('AIApp.embeddings.embed_query', return_value=[0.99, 0.01]):
+            store_generation('gpt-5', 'instructions', footer_prompt, 'footer html', [1.0, 0.0], category='Footer')
+
+            self.assertEqual(lookup_generation('gpt-5', 'instructions', hero_prompt, 'Hero')[0], None)
+            self.assertEqual(lookup_generation('gpt-5', 'instructions', hero_prompt, 'footer')[0], 'footer html')
+
+
+class TokenBucketTests(SimpleTestCase):
+    def run_with_clock(self, rate_per_minute, requests):
+        """Acquire ``requests`` token counts on a fake clock; returns the sleeps."""
+        clock = [0.0]
+        sleeps = []
+
+        async def sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        async def acquire_all():
+            bucket = TokenBucket(rate_per_minute)
+            for tokens in requests:
+                await bucket.acquire(tokens)
+
+        with mock.patch('AIApp.rate_limit.time.monotonic', side_effect=lambda: clock[0]), \
+                mock.patch('AIApp.rate_limit.asyncio.sleep', side_effect=sleep):
+            asyncio.run(acquire_all())
+        return sleeps
+
+    def test_burst_up_to_capacity_then_refill_rate(self):
+        sleeps = self.run_with_clock(60, [1] * 62)
+        self.assertEqual(len(sleeps), 2)
+        for seconds in sleeps:
+            self.assertAlmostEqual(seconds, 1.0)
+
+    def test_request_larger_than_the_bucket_waits_for_a_full_bucket(self):
+        sleeps = self.run_with_clock(60, [60, 100])
+        self.assertEqual(len(sleeps), 1)
+        self.assertAlmostEqual(sleeps[0], 60.0)
+
+
+def unit_vector(*weights):
+    """1536-dimensional vector whose leading components are ``weights``."""
+    return list(weights) + [0.0] * (1536 - len(weights))
+
+
+class SearchTemplatesBatchTests(TestCase):
+    def setUp(self):
+        for name, category, embedding in [
+            ('hero', 'Hero', unit_vector(1.0)),
+            ('footer-near', 'Footer', unit_vector(0.6, 0.8)),
+            ('footer-far', 'Footer', unit_vector(0.0, 1.0)),
+        ]:
+            PortfolioTemplate.objects.create(
+                name=name, category=category, display_name=name, description=name,
+                file_path_template=f'{name}.html', content='<div></div>', embedding=embedding
+            )
+
+    def test_category_query_never_returns_another_category(self):
+        for stage in (None, 'matryoshka'):
+            with self.subTest(stage=stage), mock.patch('AIApp.pg_vector.TEMPLATE_COARSE_STAGE', stage):
+                results = search_templates_batch([unit_vector(1.0)] * 3, ['Footer', 'footer section', None], k=3)
+
+                self.assertEqual([t.name for t in results[0]], ['footer-near', 'footer-far'])
+                self.assertEqual([t.name for t in results[1]], ['footer-near', 'footer-far'])
+                self.assertEqual([t.name for t in results[2]], ['hero', 'footer-near', 'footer-far'])
+
+
+class HybridSearchTemplatesTests(TestCase):
+    def test_reciprocal_rank_fusion_ordering(self):
+        for name, display_name, description, embedding in [
+            ('hero', 'Hero banner', 'Large banner with a headline', unit_vector(1.0)),
+            ('footer', 'Footer', 'Site footer with links', unit_vector(0.8, 0.6)),
+            ('pricing', 'Pricing card', 'Plan comparison card', unit_vector(0.6, 0.8)),
+        ]:
+            PortfolioTemplate.objects.create(
+                name=name, category='Other', display_name=display_name, description=description,
+                file_path_template=f'{name}.html', content='<div></div>', embedding=embedding
+            )
+
+        with search_settings(RRF_K=60):
+            results = hybrid_search_templates('Get me footer components', unit_vector(1.0), k=3)
+
+        # Second by distance but the only keyword match: 1/62 + 1/61 beats 1/61
+        self.assertEqual([t.name for t in results], ['footer', 'hero', 'pricing'])
+        for template, score in zip(results, [1 / 62 + 1 / 61, 1 / 61, 1 / 63]):
+            self.assertAlmostEqual(template.score, score)
+
+
+class GetTemplateCssTests(TransactionTestCase):
+    def test_concurrent_callers_generate_css_once(self):
+        PortfolioTemplate.objects.create(
+            name='hero', category='Hero', display_name='Hero', description='Hero',
+            file_path_template='hero.html', content='<div></div>', embedding=unit_vector(1.0)
+        )
+        generating = threading.Event()
+        results = []
+
+        def create_css(html_content):
+            generating.set()
+            time.sleep(1.0)
+            return '.hero {}'
+
+        def call():
+            try:
+                results.append(get_template_css('hero', '<div></div>'))
+            finally:
+                connection.close()
+
+        with mock.patch('AIApp.template_css.create_css_for_html', side_effect=create_css) as create_css_for_html:
+            first = threading.Thread(target=call)
+            first.start()
+            self.assertTrue(generating.wait(5))
+            second = threading.Thread(target=call)
+            second.start()
+            first.join()
+            second.join()
+
+        self.assertEqual(create_css_for_html.call_count, 1)
+        self.assertEqual(results, ['.hero {}', '.hero {}'])
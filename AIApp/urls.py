@@ -4,4 +4,5 @@ from . import views
 urlpatterns = [
     path('', views.chat, name='chat'),
     path('process/', views.process_prompt, name='process_prompt'),
+    path('stream/', views.stream_component, name='stream_component'),
 ]
\ No newline at end of file
@@ -1,14 +1,16 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 import json
 import os
+import re
 import sys
 import traceback
 import logging
 from pathlib import Path
 from .Crew.main import DjangoProjectGeneratorCrew
+from .Crew.openai_page_generator import make_website_stream
 from .models import *
 from openai import OpenAI
 from django.db.models import FloatField
@@ -16,6 +18,11 @@ from django.db.models.expressions import RawSQL
 
 logger = logging.getLogger(__name__)
 
+STREAM_FILENAME = re.compile(r'[\w-]+\.html')
+
+# Last fragment of a stream_component response whose generation failed
+STREAM_ERROR_TRAILER = '\n<!-- stream-error: generation failed -->\n'
+
 
 def ensure_file_creation(file_path, content, is_json=False):
     """
@@ -145,3 +152,47 @@ def process_prompt(request):
         })
 
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def stream_component(request):
+    """
+    Generate a component and stream its HTML to the client as it is produced.
+
+    A generation that fails mid-stream ends with ``STREAM_ERROR_TRAILER``.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid JSON data'
+        })
+
+    user_prompt = data.get('prompt', '').strip()
+    if not user_prompt:
+        return JsonResponse({
+            'success': False,
+            'error': 'No prompt provided'
+        })
+
+    # Only a bare .html file name is accepted; it is saved under Crew/outputs
+    filename = data.get('filename') or 'website.html'
+    if not isinstance(filename, str) or not STREAM_FILENAME.fullmatch(filename):
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid filename'
+        }, status=400)
+
+    def fragments():
+        try:
+            yield from make_website_stream(website_input=user_prompt, filename=filename)
+        except Exception:
+            # Headers are already sent, so tell the client in-band
+            logger.exception("Streaming generation failed")
+            yield STREAM_ERROR_TRAILER
+
+    response = StreamingHttpResponse(fragments(), content_type='text/html; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    # Ask reverse proxies (nginx) not to buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'AIApp',
     'pgvector'
 ]
@@ -152,9 +153,99 @@ OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
 VECTOR_SEARCH_SETTINGS = {
     'DEFAULT_SIMILARITY_THRESHOLD': 0.7,
     'DEFAULT_RESULT_LIMIT': 10,
-    'EMBEDDING_MODEL': 'text-embedding-ada-002',
+    # 'openai' (EMBEDDING_MODEL over the API) or 'onnx' (local CPU model below).
+    # Vectors are zero-padded to EMBEDDING_DIMENSION; re-index after switching.
+    # 'onnx' chunks are sized in its own tokens and rule out the 'matryoshka' stage.
+    'EMBEDDING_PROVIDER': os.getenv('EMBEDDING_PROVIDER', 'openai'),
+    'EMBEDDING_MODEL': 'text-embedding-3-small',
+    'ONNX_MODEL_PATH': os.getenv('ONNX_MODEL_PATH', str(BASE_DIR / 'models' / 'all-MiniLM-L6-v2' / 'model.onnx')),
+    'ONNX_TOKENIZER_PATH': os.getenv('ONNX_TOKENIZER_PATH', str(BASE_DIR / 'models' / 'all-MiniLM-L6-v2' / 'tokenizer.json')),
+    'ONNX_MODEL_NAME': 'all-MiniLM-L6-v2',
+    'ONNX_THREADS': int(os.getenv('ONNX_THREADS', '0')),  # 0 = onnxruntime default
+    'ONNX_BATCH_SIZE': 32,
+    'ONNX_MAX_LENGTH': 256,
     'EMBEDDING_DIMENSION': 1536,
+    # Token limit per embedding input; chunks never exceed it
     'MAX_TEXT_LENGTH': 8000,
+    # Chunk size and overlap in embedding-model tokens
+    'CHUNK_TOKENS': 256,
+    'CHUNK_OVERLAP_TOKENS': 50,
+    # Document embedding requests: at most this many inputs / characters each
+    'EMBEDDING_BATCH_SIZE': 512,
+    'EMBEDDING_BATCH_MAX_CHARS': 400000,
+    # populate_portfolio_templates.py: requests in flight, the token budget
+    # of our OpenAI tier and retries (jittered exponential backoff)
+    'EMBEDDING_CONCURRENCY': 8,
+    'EMBEDDING_TOKENS_PER_MINUTE': 1000000,
+    'EMBEDDING_MAX_RETRIES': 5,
+    # Chunks saved by the crew tool are embedded by `manage.py embedding_worker`
+    'DEFER_CHUNK_EMBEDDINGS': True,
+    'EMBEDDING_WORKER_BATCH_SIZE': 64,
+    'EMBEDDING_WORKER_POLL_INTERVAL': 5.0,
+    # Failed attempts before the worker marks a chunk failed
+    'EMBEDDING_MAX_ATTEMPTS': 5,
+    # Claims older than this are taken over by another worker (seconds)
+    'EMBEDDING_LEASE_SECONDS': 600,
+    # Processes parsing HTML files during bulk ingestion (None = one per core)
+    'INGEST_PARSE_WORKERS': None,
+    # Minimum cosine similarity for a stored template to be reused by the crew
+    'TEMPLATE_MATCH_THRESHOLD': 0.4,
+    # Per-query ANN tuning (applied with SET LOCAL inside the search transaction)
+    'HNSW_EF_SEARCH': 40,
+    'IVFFLAT_PROBES': 10,
+    # 'memory' serves template lookups from the per-worker NumPy index,
+    # 'pgvector' queries the database HNSW indexes, 'hybrid' fuses full-text
+    # and vector rankings in Postgres
+    'TEMPLATE_SEARCH_BACKEND': 'memory',
+    # Chunk/document search: 'vector' or 'hybrid' (full-text + vector fusion)
+    'CHUNK_SEARCH_BACKEND': 'vector',
+    # Max age in seconds of a worker's template index before it is rebuilt
+    'TEMPLATE_INDEX_TTL': 300,
+    # Query embedding cache: in-process LRU in front of a diskcache store
+    'EMBEDDING_CACHE_MEMORY_ENTRIES': 1024,
+    'EMBEDDING_CACHE_DIR': os.getenv('EMBEDDING_CACHE_DIR', str(BASE_DIR / '.embedding_cache')),
+    'EMBEDDING_CACHE_SIZE_LIMIT': 256 * 1024 * 1024,  # bytes
+    # Hybrid search: candidates taken from each ranking and the RRF constant
+    'HYBRID_CANDIDATES': 50,
+    'RRF_K': 60,
+    # Two-stage search: take candidates from a compact index first
+    # ('matryoshka' = truncated embedding_coarse; chunks also support
+    # 'halfvec' and 'binary'), over-sample them and re-rank with the
+    # full-precision vectors. None searches the full index directly.
+    # Every stage's column and index exist, so the stage can change freely.
+    'TEMPLATE_COARSE_STAGE': None,
+    'CHUNK_COARSE_STAGE': None,
+    'RERANK_OVERSAMPLE': 4,
+    # make_website generation cache: exact prompt hits plus near hits whose
+    # prompt embedding reaches GENERATION_CACHE_THRESHOLD (None = exact only)
+    'GENERATION_CACHE_ENABLED': True,
+    'GENERATION_CACHE_THRESHOLD': 0.95,
+    'GENERATION_CACHE_TTL': 24 * 60 * 60,  # seconds
+    'GENERATION_CACHE_MAX_ENTRIES': 256,
+    'GENERATION_CACHE_DIR': os.getenv('GENERATION_CACHE_DIR', str(BASE_DIR / '.generation_cache')),
+    'GENERATION_CACHE_SIZE_LIMIT': 256 * 1024 * 1024,  # bytes
+    # Worker threads of one generate_components call (the process-wide cap
+    # on calls to the generation model is its MODEL_CONCURRENCY entry)
+    'GENERATION_CONCURRENCY': 4,
+    # Rate limit for `manage.py precompute_template_css`
+    'CSS_REQUESTS_PER_MINUTE': 60,
+    # Seconds a request waits for another process generating the same
+    # template's CSS before generating it itself
+    'CSS_LOCK_WAIT': 60.0,
+    # Shared OpenAI HTTP clients (AIApp.llm_clients)
+    'OPENAI_CONNECT_TIMEOUT': 5.0,  # seconds
+    'OPENAI_READ_TIMEOUT': 300.0,  # seconds between response bytes
+    'OPENAI_MAX_CONNECTIONS': 20,
+    'OPENAI_MAX_KEEPALIVE_CONNECTIONS': 10,
+    'OPENAI_KEEPALIVE_EXPIRY': 60.0,  # seconds
+    'OPENAI_MAX_RETRIES': 2,
+    # Calls in flight per model in each process ('default' for unlisted models)
+    'MODEL_CONCURRENCY': {
+        'default': 4,
+        'gpt-5': 4,
+        'gpt-4o': 4,
+        'text-embedding-3-small': 8,
+    },
 }
 
 # Logging configuration
@@ -1,10 +1,21 @@
+"""
+Load websites/components into PortfolioTemplate.
+
+Embeddings are generated by an asyncio pipeline: up to EMBEDDING_CONCURRENCY
+requests in flight, a token bucket sized to EMBEDDING_TOKENS_PER_MINUTE, and
+retries with jittered exponential backoff. With a local EMBEDDING_PROVIDER
+the components are embedded in-process instead. All database writes happen
+afterwards in one short transaction.
+"""
+
 import os
 import sys
 import json
+import asyncio
+import random
 import django
 from pathlib import Path
 import openai
-client = openai.OpenAI()
 # Add project root to Python path
 PROJECT_ROOT = Path(__file__).resolve().parent
 sys.path.append(str(PROJECT_ROOT))
@@ -15,8 +26,20 @@ django.setup()
 
 from django.db import transaction
 from AIApp.models import PortfolioTemplate
+from AIApp.embeddings import get_embedding_provider
+from AIApp.llm_clients import create_async_openai_client
+from AIApp.pg_vector import get_search_setting
+from AIApp.rate_limit import TokenBucket
+from AIApp.template_index import bump_template_index_version
 from django.conf import settings
 
+# Errors worth retrying; anything else fails the component immediately
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
 
 
 BASE_DIR = PROJECT_ROOT / 'websites/components'
@@ -37,17 +60,30 @@ def read_css_content(file_path):
         print(f"✗ Error reading {file_path}: {e}")
         return ""
 
-def generate_embedding(text):
-    try:
-        response = client.embeddings.create(
-            input=text,
-            model="text-embedding-3-small"
-        )
-        embedding = response.data[0].embedding
-        return embedding
-    except Exception as e:
-        print(f"✗ Embedding generation failed: {e}")
-        return None
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) for rate limiting."""
+    return max(1, len(text) // 4)
+
+
+async def generate_embedding(client, text, semaphore, bucket, max_retries):
+    model = get_search_setting('EMBEDDING_MODEL', 'text-embedding-3-small')
+    for attempt in range(max_retries + 1):
+        await bucket.acquire(estimate_tokens(text))
+        try:
+            async with semaphore:
+                response = await client.embeddings.create(input=text, model=model)
+            return response.data[0].embedding
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_retries:
+                print(f"✗ Embedding generation failed after {attempt + 1} attempts: {e}")
+                return None
+            # Full jitter: sleep a random time up to the exponential cap
+            delay = random.uniform(0, min(60, 2 ** attempt))
+            print(f"  … Retrying embedding in {delay:.1f}s ({e.__class__.__name__})")
+            await asyncio.sleep(delay)
+        except Exception as e:
+            print(f"✗ Embedding generation failed: {e}")
+            return None
 
 def read_js_content(file_path):
     try:
@@ -95,101 +131,135 @@ def group_files_by_base_name(files):
     
     return grouped
 
-def populate_templates(clear_existing=False):
-    if clear_existing:
-        deleted_count = PortfolioTemplate.objects.count()
-        PortfolioTemplate.objects.all().delete()
-        print(f"⚠️  Cleared {deleted_count} existing templates")
+def build_component(base_name, files):
+    """Read a component group into PortfolioTemplate field values, or None."""
+    # Skip files that don't have HTML content
+    if 'html' not in files:
+        print(f"✗ Skipping {base_name}: No HTML file found")
+        return None
+    
+    html_file = files['html']
+    css_file = files.get('css')
+    js_file = files.get('js')
+    
+    # Extract category from filename
+    category = extract_category_from_filename(html_file.name)
+    
+    print(f"📁 Reading: {base_name} (category: {category})")
+
+    # Read file contents
+    content = read_html_content(html_file)
+    css_content = read_css_content(css_file) if css_file else ""
+    js_content = read_js_content(js_file) if js_file else ""
+    
+    # Combine all content for embedding
+    combined_content = content
+    if css_content:
+        combined_content += f"\n\n<!-- CSS -->\n<style>\n{css_content}\n</style>"
+    if js_content:
+        combined_content += f"\n\n<!-- JavaScript -->\n<script>\n{js_content}\n</script>"
+
+    return {
+        'name': base_name,
+        'category': category,
+        'display_name': f"{base_name.replace('_', ' ').title()} ({category})",
+        'description': f"{category} component - {base_name.replace('_', ' ')}",
+        'file_path_template': str(html_file.relative_to(BASE_DIR.parent)),
+        'content': combined_content,
+        'css_content': css_content,
+        'is_active': True,
+    }
+
+def embed_components_locally(components):
+    """Attach embeddings from a local provider (EMBEDDING_PROVIDER='onnx')."""
+    provider = get_embedding_provider()
+    vectors = provider.embed_documents([component['content'] for component in components])
+    for component, vector in zip(components, vectors):
+        component['embedding'] = vector
+    print(f"  ✓ Embedded {len(components)} components with {provider.model_name}")
+    return components
+
+async def embed_components(components):
+    """Attach an embedding to every component concurrently; drop failures."""
+    client = create_async_openai_client()
+    semaphore = asyncio.Semaphore(get_search_setting('EMBEDDING_CONCURRENCY', 8))
+    bucket = TokenBucket(get_search_setting('EMBEDDING_TOKENS_PER_MINUTE', 1000000))
+    max_retries = get_search_setting('EMBEDDING_MAX_RETRIES', 5)
+
+    async def embed(component):
+        component['embedding'] = await generate_embedding(
+            client, component['content'], semaphore, bucket, max_retries
+        )
+        if component['embedding'] is None:
+            print(f"✗ Skipping {component['name']} due to embedding error")
+        else:
+            print(f"  ✓ Embedded: {component['name']}")
+        return component
+
+    try:
+        embedded = await asyncio.gather(*(embed(component) for component in components))
+    finally:
+        await client.close()
+
+    return [component for component in embedded if component['embedding'] is not None]
+
+def save_components(components, clear_existing=False):
+    """Upsert the embedded components in one short transaction."""
+    names = [component['name'] for component in components]
+
+    with transaction.atomic():
+        if clear_existing:
+            deleted_count = PortfolioTemplate.objects.count()
+            PortfolioTemplate.objects.all().delete()
+            print(f"⚠️  Cleared {deleted_count} existing templates")
+
+        existing = set(PortfolioTemplate.objects.filter(name__in=names).values_list('name', flat=True))
+        PortfolioTemplate.objects.bulk_create(
+            [PortfolioTemplate(**component) for component in components],
+            update_conflicts=True,
+            unique_fields=['name'],
+            update_fields=[
+                'category', 'display_name', 'description', 'file_path_template',
+                'content', 'css_content', 'embedding', 'is_active', 'updated_at'
+            ],
+            batch_size=500
+        )
+
+    # bulk_create skips post_save, so invalidate the in-memory index here
+    bump_template_index_version()
+
+    return len(components) - len(existing), len(existing)
 
+def populate_templates(clear_existing=False):
     created_count = 0
     updated_count = 0
     error_count = 0
 
-    try:
-        with transaction.atomic():
-            # Get all files in the components directory
-            all_files = list(BASE_DIR.iterdir())
-            
-            # Group files by their base names
-            grouped_files = group_files_by_base_name(all_files)
-            
-            print(f"\n📁 Found {len(grouped_files)} component groups to process")
-
-            for base_name, files in grouped_files.items():
-                # Skip files that don't have HTML content
-                if 'html' not in files:
-                    print(f"✗ Skipping {base_name}: No HTML file found")
-                    error_count += 1
-                    continue
-                
-                html_file = files['html']
-                css_file = files.get('css')
-                js_file = files.get('js')
-                
-                # Extract category from filename
-                category = extract_category_from_filename(html_file.name)
-                
-                print(f"\n📁 Processing: {base_name} (category: {category})")
-
-                # Read file contents
-                content = read_html_content(html_file)
-                css_content = read_css_content(css_file) if css_file else ""
-                js_content = read_js_content(js_file) if js_file else ""
-                
-                # Combine all content for embedding
-                combined_content = content
-                if css_content:
-                    combined_content += f"\n\n<!-- CSS -->\n<style>\n{css_content}\n</style>"
-                if js_content:
-                    combined_content += f"\n\n<!-- JavaScript -->\n<script>\n{js_content}\n</script>"
-
-                # Generate embedding from combined content
-                embedding = generate_embedding(combined_content)
-
-                if not embedding:
-                    print(f"✗ Skipping {base_name} due to embedding error")
-                    error_count += 1
-                    continue
-
-                # Create display name and description
-                display_name = f"{base_name.replace('_', ' ').title()} ({category})"
-                description = f"{category} component - {base_name.replace('_', ' ')}"
-                file_path_template = str(html_file.relative_to(BASE_DIR.parent))
-
-                try:
-                    template_obj, created = PortfolioTemplate.objects.get_or_create(
-                        name=base_name,
-                        defaults={
-                            'category': category,
-                            'display_name': display_name,
-                            'description': description,
-                            'file_path_template': file_path_template,
-                            'content': combined_content,
-                            'css_content': css_content,
-                            'embedding': embedding,
-                            'is_active': True
-                        }
-                    )
-
-                    if created:
-                        created_count += 1
-                        print(f"  ✓ Created: {base_name}")
-                    else:
-                        template_obj.category = category
-                        template_obj.display_name = display_name
-                        template_obj.description = description
-                        template_obj.file_path_template = file_path_template
-                        template_obj.content = combined_content
-                        template_obj.css_content = css_content
-                        template_obj.embedding = embedding
-                        template_obj.save()
-                        updated_count += 1
-                        print(f"  ↻ Updated: {base_name}")
-
-                except Exception as e:
-                    error_count += 1
-                    print(f"  ✗ Error processing {base_name}: {e}")
+    # Get all files in the components directory
+    all_files = list(BASE_DIR.iterdir())
+    
+    # Group files by their base names
+    grouped_files = group_files_by_base_name(all_files)
+    
+    print(f"\n📁 Found {len(grouped_files)} component groups to process")
+
+    components = []
+    for base_name, files in grouped_files.items():
+        component = build_component(base_name, files)
+        if component is None:
+            error_count += 1
+        else:
+            components.append(component)
 
+    print(f"\n🧠 Embedding {len(components)} components")
+    if get_search_setting('EMBEDDING_PROVIDER', 'openai') == 'openai':
+        embedded = asyncio.run(embed_components(components))
+    else:
+        embedded = embed_components_locally(components)
+    error_count += len(components) - len(embedded)
+
+    try:
+        created_count, updated_count = save_components(embedded, clear_existing)
     except Exception as e:
         print(f"✗ Transaction failed: {e}")
         return